@@ -1,15 +1,42 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Union
+
+import pandas as pd
+from flair.data import Sentence
 from jurispacy_tokenizer import JuriSpacyTokenizer
 from flair.models import SequenceTagger
-from juritools.type import Decision, CategoryEnum
+from juritools.type import (
+    Decision,
+    CategoryEnum,
+    DecisionSourceNameEnum,
+    NamedEntity,
+    OutputTrackingEnum,
+    output_tracking,
+)
 from juritools.postprocessing import PostProcessFromEntities, PostProcessFromSents, PostProcessFromText
+from juritools.postprocessing.gazetteers import warmup
+from juritools.postprocessing.token_table import TokenTable
 from juritools.preprocess import PreProcess
-from juritools.predict import JuriTagger
+from juritools.predict import (
+    JuriTagger,
+    PredictionCache,
+    pack_entities,
+    unpack_entities,
+)
+
+# tokenizer of the postprocessing worker processes, see make_postprocess_executor
+_worker_tokenizer: Optional[JuriSpacyTokenizer] = None
 
 
 def ner(
     decision: Decision,
     tokenizer: JuriSpacyTokenizer,
     model: SequenceTagger,
+    max_tokens_per_batch: Optional[int] = None,
+    prediction_cache: Optional[PredictionCache] = None,
+    lean: bool = False,
 ):
     """Returns the predictions of the NER Model
 
@@ -17,34 +44,386 @@ def ner(
         decision (Decision): the decision to analyze
         tokenizer (JuriSpacyTokenizer): tokenizer to create tokens and sentences
         model (SequenceTagger): a trained NER model
+        max_tokens_per_batch (int, optional): if given, the model mini-batches are
+            capped by their number of padded tokens instead of a number of sentences,
+            which also bounds the memory used by a long decision. Defaults to None.
+        prediction_cache (PredictionCache, optional): cache of the predictions by
+            sentence, meant to be shared across calls. Defaults to None.
+        lean (bool, optional): memory-lean prediction, see `JuriTagger.predict`: the
+            flair sentences hold neither embeddings nor probability distributions
+            across categories, and are converted into a TokenTable then released
+            before the postprocessing. The response is the same, the postprocessing
+            only reads the tokens and the predicted spans, so a service can turn it
+            on to lower its memory use per request. Defaults to False.
 
     Raises:
-        HTTPException: _description_
+        ValueError: if the decision has parties but an unknown source name
 
     Returns:
-        _type_: _description_
+        dict: the postprocessed entities, under "entities", and the messages of the
+            manual checks to perform, under "checklist"
     """
 
-    response = {}
-
     # preprocessing metadata
     preprocess = PreProcess(
         decision=decision,
         tokenizer=tokenizer,
         model=model,
     )
-    metadata = preprocess.metadata
-    text = preprocess.text
 
     # SequenceTagger predictions
-    juritag = JuriTagger(tokenizer, model)
-    juritag.predict(text, verbose=False)
-    prediction_jsonified = juritag.get_entity_json_from_flair_sentences()
+    juritag = JuriTagger(tokenizer, model, cache=prediction_cache)
+    juritag.predict(
+        preprocess.text,
+        verbose=False,
+        max_tokens_per_batch=max_tokens_per_batch,
+        lean=lean,
+    )
+    flair_sentences, entities = _postprocess_inputs(juritag, lean)
+    # in the lean mode, the flair sentences are released before the postprocessing
+    del juritag
+
+    return _postprocess(
+        text=preprocess.text,
+        metadata=preprocess.metadata,
+        flair_sentences=flair_sentences,
+        entities=entities,
+        tokenizer=tokenizer,
+        categories=decision.categories,
+        source_name=decision.sourceName,
+    )
+
+
+def ner_batch(
+    decisions: list[Decision],
+    tokenizer: JuriSpacyTokenizer,
+    model: SequenceTagger,
+    batch_size: int = 32,
+    executor: Optional[Executor] = None,
+    max_tokens_per_batch: Optional[int] = None,
+    prediction_cache: Optional[PredictionCache] = None,
+    lean: bool = False,
+) -> list[dict]:
+    """Returns the predictions of the NER Model for several decisions at once
+
+    The sentences of every decision are pooled into shared mini-batches so that
+    the model is called once for the whole batch instead of once per decision.
+    The postprocessing is then applied to each decision separately.
+
+    Args:
+        decisions (list[Decision]): the decisions to analyze
+        tokenizer (JuriSpacyTokenizer): tokenizer to create tokens and sentences
+        model (SequenceTagger): a trained NER model
+        batch_size (int, optional): number of sentences per model mini-batch.
+            Defaults to 32.
+        executor (Executor, optional): pool created by `make_postprocess_executor`.
+            If given, the model inference stays in the current process and the
+            postprocessing of the decisions is spread over the pool workers.
+            Defaults to None.
+        max_tokens_per_batch (int, optional): if given, the model mini-batches are
+            capped by their number of padded tokens instead of batch_size.
+            Defaults to None.
+        prediction_cache (PredictionCache, optional): cache of the predictions by
+            sentence, meant to be shared across calls. Defaults to None.
+        lean (bool, optional): memory-lean prediction, see `ner`. Defaults to False.
+
+    Returns:
+        list[dict]: one response per decision, in the same order as `decisions`
+    """
+    preprocesses = [
+        PreProcess(
+            decision=decision,
+            tokenizer=tokenizer,
+            model=model,
+        )
+        for decision in decisions
+    ]
+
+    # SequenceTagger predictions on the pooled sentences
+    juritaggers = JuriTagger.predict_batch(
+        tokenizer,
+        model,
+        [preprocess.text for preprocess in preprocesses],
+        mini_batch_size=batch_size,
+        verbose=False,
+        max_tokens_per_batch=max_tokens_per_batch,
+        cache=prediction_cache,
+        lean=lean,
+    )
+
+    # a TokenTable is sent to the pool workers, being cheaper to pickle than the flair sentences
+    inputs = [_postprocess_inputs(juritag, lean or executor is not None) for juritag in juritaggers]
+    del juritaggers
+
+    if executor is not None:
+        payloads = [
+            (
+                preprocess.text,
+                preprocess.metadata,
+                token_table,
+                pack_entities(entities),
+                decision.categories,
+                decision.sourceName,
+            )
+            for decision, preprocess, (token_table, entities) in zip(decisions, preprocesses, inputs)
+        ]
+        return list(executor.map(_postprocess_worker, payloads))
+
+    return [
+        _postprocess(
+            text=preprocess.text,
+            metadata=preprocess.metadata,
+            flair_sentences=flair_sentences,
+            entities=entities,
+            tokenizer=tokenizer,
+            categories=decision.categories,
+            source_name=decision.sourceName,
+        )
+        for decision, preprocess, (flair_sentences, entities) in zip(decisions, preprocesses, inputs)
+    ]
+
+
+class NerBatcher:
+    """Gathers the decisions of concurrent `ner_async` calls into `ner_batch` calls
+
+    A batch is started when `max_batch_size` decisions are waiting, or `max_delay`
+    seconds after the first one arrived. Only one batch runs at a time, in an
+    executor so that the event loop stays responsive: the decisions arriving
+    meanwhile make up the next batch, whose size grows with the load.
+
+    The batcher must be created and used in the same event loop.
+
+    Args:
+        tokenizer (JuriSpacyTokenizer): tokenizer to create tokens and sentences
+        model (SequenceTagger): a trained NER model
+        max_delay (float, optional): longest wait, in seconds, for other decisions
+            before a batch is started. Defaults to 0.005.
+        max_batch_size (int, optional): largest number of decisions per batch.
+            Defaults to 16.
+        batch_executor (Executor, optional): executor running the batches. Defaults
+            to a dedicated thread, the model is then never called concurrently.
+        **ner_batch_kwargs: other arguments of `ner_batch`, e.g. `batch_size`,
+            `max_tokens_per_batch`, `prediction_cache` or the postprocessing
+            `executor` created by `make_postprocess_executor`
+    """
+
+    def __init__(
+        self,
+        tokenizer: JuriSpacyTokenizer,
+        model: SequenceTagger,
+        max_delay: float = 0.005,
+        max_batch_size: int = 16,
+        batch_executor: Optional[Executor] = None,
+        **ner_batch_kwargs,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+        self.tokenizer = tokenizer
+        self.model = model
+        self.max_delay = max_delay
+        self.max_batch_size = max_batch_size
+        self.batch_executor = batch_executor if batch_executor is not None else ThreadPoolExecutor(max_workers=1)
+        self.ner_batch_kwargs = ner_batch_kwargs
+        # decisions waiting for the next batch, with the futures of their responses
+        self._pending: list[tuple[Decision, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Optional[asyncio.Task] = None
+
+    async def ner(self, decision: Decision) -> dict:
+        """Returns the response of `ner` for the decision, computed in a batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((decision, future))
+        if self._running is None:
+            if len(self._pending) >= self.max_batch_size:
+                self._start_batch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_delay, self._start_batch)
+        return await future
+
+    def _start_batch(self):
+        """Starts a batch with the oldest pending decisions"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # requests cancelled while waiting are dropped
+        self._pending = [(decision, future) for decision, future in self._pending if not future.done()]
+        if not self._pending:
+            return
+        batch = self._pending[: self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size :]
+        self._running = asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list[tuple[Decision, asyncio.Future]]):
+        """Runs a batch in the executor and resolves the futures of its decisions
+
+        If the batch is cancelled, e.g. when the event loop shuts down, the
+        requests of the batch are cancelled too instead of waiting forever.
+        """
+        try:
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.batch_executor,
+                    functools.partial(
+                        _ner_batch_or_each,
+                        [decision for decision, _ in batch],
+                        self.tokenizer,
+                        self.model,
+                        **self.ner_batch_kwargs,
+                    ),
+                )
+            except Exception as exception:
+                results = [exception] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except BaseException:
+            for _, future in batch:
+                future.cancel()
+            raise
+        finally:
+            self._running = None
+            # the decisions that arrived during the batch have already waited
+            if self._pending:
+                self._start_batch()
+
+    def close(self):
+        """Shuts down the executor of the batches"""
+        self.batch_executor.shutdown(wait=True)
+
+
+async def ner_async(decision: Decision, batcher: NerBatcher) -> dict:
+    """Returns the predictions of the NER Model without blocking the event loop
+
+    The decisions of concurrent calls sharing the same batcher are analyzed
+    together with `ner_batch`. Each call gets the response of its own decision,
+    the same as `ner` would return.
+
+    Args:
+        decision (Decision): the decision to analyze
+        batcher (NerBatcher): batcher holding the tokenizer and the model, meant
+            to be created once, e.g. at server startup
+
+    Returns:
+        dict: the response of the decision
+    """
+    return await batcher.ner(decision)
+
+
+def _ner_batch_or_each(
+    decisions: list[Decision],
+    tokenizer: JuriSpacyTokenizer,
+    model: SequenceTagger,
+    **ner_batch_kwargs,
+) -> list[Union[dict, Exception]]:
+    """Runs `ner_batch`, and the decisions one by one if it fails
+
+    Returns the response or the exception of each decision, so that a faulty
+    decision only fails its own request.
+    """
+    try:
+        return ner_batch(decisions, tokenizer, model, **ner_batch_kwargs)
+    except Exception as exception:
+        if len(decisions) == 1:
+            return [exception]
+    results = []
+    for decision in decisions:
+        try:
+            results.extend(ner_batch([decision], tokenizer, model, **ner_batch_kwargs))
+        except Exception as exception:
+            results.append(exception)
+    return results
+
+
+def make_postprocess_executor(
+    tokenizer: JuriSpacyTokenizer,
+    max_workers: Optional[int] = None,
+) -> ProcessPoolExecutor:
+    """Returns a process pool ready to postprocess decisions with `ner_batch`
+
+    Each worker receives its own copy of the tokenizer and builds the
+    gazetteers (cities, facilities, street types...) once, when it starts.
+    The pool is meant to be created once and reused across calls.
+
+    Args:
+        tokenizer (JuriSpacyTokenizer): tokenizer used by the postprocessing
+        max_workers (int, optional): number of worker processes.
+            Defaults to the number of CPUs.
+
+    Returns:
+        ProcessPoolExecutor: the process pool
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_postprocess_worker,
+        initargs=(tokenizer,),
+    )
+
+
+def _init_postprocess_worker(tokenizer: JuriSpacyTokenizer):
+    """Loads the tokenizer and the gazetteers in a worker process"""
+    global _worker_tokenizer
+    _worker_tokenizer = tokenizer
+    warmup()
+
+
+def _postprocess_worker(payload: tuple) -> dict:
+    """Postprocesses a decision sent by `ner_batch` in a worker process"""
+    text, metadata, token_table, packed_entities, categories, source_name = payload
+
+    return _postprocess(
+        text=text,
+        metadata=metadata,
+        flair_sentences=token_table,
+        entities=unpack_entities(packed_entities),
+        tokenizer=_worker_tokenizer,
+        categories=categories,
+        source_name=source_name,
+    )
+
+
+def _postprocess_inputs(
+    juritag: JuriTagger,
+    token_table: bool,
+) -> tuple[Union[list[Sentence], TokenTable], list[NamedEntity]]:
+    """Returns the sentences and the entities of a JuriTagger passed to `_postprocess`
+
+    With token_table, the sentences are converted into a TokenTable so that the
+    postprocessing holds no flair objects.
+    """
+    if token_table:
+        flair_sentences = TokenTable.from_flair_sentences(juritag.flair_sentences)
+    else:
+        flair_sentences = juritag.flair_sentences
+    return flair_sentences, juritag.get_entity_json_from_flair_sentences()
+
+
+@output_tracking(OutputTrackingEnum.disabled)
+def _postprocess(
+    text: str,
+    metadata: Optional[pd.DataFrame],
+    flair_sentences: Union[list[Sentence], TokenTable],
+    entities: list[NamedEntity],
+    tokenizer: JuriSpacyTokenizer,
+    categories: Optional[list[CategoryEnum]],
+    source_name: DecisionSourceNameEnum,
+) -> dict:
+    """Applies the postprocessing chain on the predictions of a single decision
+
+    The PostProcessOutput returned by the postprocessing methods are not used here,
+    so they record nothing.
+    """
+
+    response = {}
 
     # Postprocessing on court decision text
     postpro_text = PostProcessFromText(
         text=text,
-        entities=prediction_jsonified,
+        entities=entities,
         checklist=[],
         metadata=metadata,
     )
@@ -60,7 +439,7 @@ def ner(
     )
     # postpro_entities.match_physicomorale()
     postpro_entities.match_address_in_moral()
-    if decision.categories and CategoryEnum.personneMorale not in decision.categories:
+    if categories and CategoryEnum.personneMorale not in categories:
         postpro_entities.match_natural_persons_in_moral(False)
     postpro_entities.change_pro_to_physique()
     # postpro_entities.manage_natural_persons()
@@ -87,9 +466,9 @@ def ner(
     postpro_text.match_name_in_website()
     try:
         if metadata is not None:
-            if decision.sourceName == "jurinet":
+            if source_name == "jurinet":
                 postpro_text.match_metadata_jurinet()
-            elif decision.sourceName == "jurica":
+            elif source_name == "jurica":
                 postpro_text.match_metadata_jurica()
     except Exception:
         pass
@@ -97,22 +476,22 @@ def ner(
 
     # Postprocessing on flair sentences
     postpro_sents = PostProcessFromSents(
-        flair_sentences=juritag.flair_sentences,
+        flair_sentences=flair_sentences,
         entities=postpro_text.entities,
         checklist=postpro_text.checklist,
         metadata=metadata,
     )
-    postpro_sents.apply_methods(change_pro_no_context=False)
+    postpro_sents.apply_methods(change_pro_no_context=False, document_level=True)
 
-    if decision.categories and (CategoryEnum.personneMorale not in decision.categories):
+    if categories and (CategoryEnum.personneMorale not in categories):
         postpro_sents.match_cities_in_moral(False)
 
     entities = postpro_sents.ordered_entities()
 
     # Handle categories parameter
-    if isinstance(decision.categories, list):
+    if isinstance(categories, list):
         filter_entities = []
-        for category in decision.categories:
+        for category in categories:
             filter_entities.extend(postpro_sents.entities_by_category[category])
         response["entities"] = filter_entities
     else:
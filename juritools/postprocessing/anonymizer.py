@@ -1,17 +1,130 @@
+import bisect
+import io
 import random
 import string
-from operator import itemgetter
-from typing import Dict
+from operator import attrgetter
+from typing import Any, Dict, Iterator, Optional, Union
 
-from flashtext import KeywordProcessor
+from juritools.type import CategoryEnum, NamedEntity, ReplacementEnum
+from juritools.utils import instantiate_flashtext
 
-from juritools.type import NamedEntity
+
+class OffsetMap:
+    """Maps the positions of a text rendered by Anonymizer.render back to the original text
+
+    The rendered text is a sequence of segments, either copied from the original
+    text or replacing an entity.
+    """
+
+    def __init__(self):
+        self.output_starts: list[int] = []
+        self.source_starts: list[int] = []
+        self.source_ends: list[int] = []
+        self.replaced: list[bool] = []
+
+    def add_segment(self, output_start: int, source_start: int, source_end: int, replaced: bool):
+        """Appends a segment, segments must be added in the order of the rendered text"""
+        self.output_starts.append(output_start)
+        self.source_starts.append(source_start)
+        self.source_ends.append(source_end)
+        self.replaced.append(replaced)
+
+    def to_source(self, position: int) -> int:
+        """
+        This function returns the position in the original text of a position
+        in the rendered text. Every position of a replacement is mapped to the
+        start of the replaced entity.
+        Inputs:
+        - position: position in the rendered text
+        """
+        if position < 0:
+            raise ValueError(f"position must be positive, got {position}")
+        index = bisect.bisect_right(self.output_starts, position) - 1
+        if index < 0:
+            return position
+        if self.replaced[index]:
+            return self.source_starts[index]
+        return min(self.source_starts[index] + position - self.output_starts[index], self.source_ends[index])
+
+
+class PseudonymAllocator:
+    """Hands out the letters replacing the names of persons
+
+    The same name, whatever its case, always gets the same letters. New names get
+    the codes of one letter in a random order, then the codes of two letters and
+    so on, with no limit. The order is a random permutation of each code length,
+    drawn lazily with a Fisher-Yates shuffle, so that each new code is found in
+    constant time.
+
+    Sharing an allocator between the Anonymizer of related decisions replaces a
+    person by the same letters in all of them.
+
+    Args:
+        seed (optional): seed of the permutations, for reproducible reruns.
+            Defaults to None, i.e. the global random generator is used.
+    """
+
+    def __init__(self, seed=None):
+        self._random = random if seed is None else random.Random(seed)
+        self._pseudonyms: Dict[str, str] = {}
+        # number of letters of the codes being handed out
+        self._size = 1
+        # number of codes handed out for the current size
+        self._drawn = 0
+        # positions of the partial shuffle which do not hold their own index
+        self._swaps: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._pseudonyms)
+
+    def __getitem__(self, name: str) -> str:
+        """Returns the letters of a name, allocating them on first use"""
+        key = name.lower()
+        pseudonym = self._pseudonyms.get(key)
+        if pseudonym is None:
+            pseudonym = self._pseudonyms[key] = self._next_code()
+        return pseudonym
+
+    def _next_code(self) -> str:
+        """Returns the next code of the permutation, e.g. 'K.'"""
+        n_codes = 26**self._size
+        if self._drawn == n_codes:
+            self._size += 1
+            self._drawn = 0
+            self._swaps = {}
+            n_codes = 26**self._size
+        # step of the Fisher-Yates shuffle of range(n_codes), only the swapped positions are stored
+        drawn = self._drawn
+        position = self._random.randrange(drawn, n_codes)
+        index = self._swaps.pop(position, position)
+        if position != drawn:
+            self._swaps[position] = self._swaps.pop(drawn, drawn)
+        self._drawn += 1
+
+        letters = []
+        for _ in range(self._size):
+            index, letter = divmod(index, 26)
+            letters.append(string.ascii_uppercase[letter])
+        return "".join(letters) + "."
 
 
 class Anonymizer:
-    def __init__(self, text: str, entities: list[NamedEntity]):
+    def __init__(
+        self,
+        text: str,
+        entities: list[NamedEntity],
+        allocator: Optional[PseudonymAllocator] = None,
+    ):
+        """
+        Inputs:
+        - text: original text of the decision
+        - entities: entities of the decision
+        - allocator: letters replacing the persons, shared by related decisions.
+        Defaults to a new allocator.
+        """
         self.text = text
         self.entities = entities
+        self.allocator = allocator if allocator is not None else PseudonymAllocator()
 
     def replace_person_entities(self, category: list):
 
@@ -23,56 +136,11 @@ class Anonymizer:
         Example: ['personnephysique']
         """
 
-        entities_to_replace: Dict[str, str] = {}
-        capital_letters = string.ascii_uppercase
-        check_letters = set()
-        index = 1
         keyword_processor = self._instantiate_flashtext(True)
         for entity in self.entities:
             if entity.label.value in category:
-                # Dealing with replacement letters
-                if entity.text.lower() not in entities_to_replace.keys():
-                    if index <= 26:
-                        replacement = f"{random.choice(capital_letters)}."
-                        while replacement in check_letters:
-                            replacement = f"{random.choice(capital_letters)}."
-                    elif index <= 26**2:
-                        replacement = (
-                            random.choice(capital_letters)
-                            + random.choice(capital_letters)
-                            + "."
-                        )
-                        while replacement in check_letters:
-                            replacement = (
-                                random.choice(capital_letters)
-                                + random.choice(capital_letters)
-                                + "."
-                            )
-                    elif index <= 26**3:
-                        replacement = (
-                            random.choice(capital_letters)
-                            + random.choice(capital_letters)
-                            + random.choice(capital_letters)
-                            + "."
-                        )
-                        while replacement in check_letters:
-                            replacement = (
-                                random.choice(capital_letters)
-                                + random.choice(capital_letters)
-                                + random.choice(capital_letters)
-                                + "."
-                            )
-                    else:
-                        return "Too much people to replace!"
-                    index += 1
-                    check_letters.add(replacement)
-                    entities_to_replace[entity.text.lower()] = replacement
-
-                else:
-                    replacement = entities_to_replace[entity.text.lower()]
-
                 # Replacing physical person entities by letters
-                keyword_processor.add_keyword(entity.text, replacement)
+                keyword_processor.add_keyword(entity.text, self.allocator[entity.text])
 
         return keyword_processor.replace_keywords(self.text)
 
@@ -108,12 +176,149 @@ class Anonymizer:
         Example: ['adresse']
         """
 
-        ordered_entities = self._ordered_entities(reverse=True)
-        text = self.text
-        for entity in ordered_entities:
-            if entity.label.value in category:
-                text = f"{text[:entity.start]}[{entity.label.value}]{text[entity.end:]}"
-        return text
+        return self.render({entity_category: ReplacementEnum.label for entity_category in category})
+
+    def render(
+        self,
+        policies: dict[Union[CategoryEnum, str], Union[ReplacementEnum, str]],
+        offset_map: Optional[OffsetMap] = None,
+    ) -> str:
+        """
+        This function replaces the entities of the given categories using their
+        indexes, in a single pass over the original text. Overlapping entities
+        are replaced together, by the replacement of the first one.
+        Inputs:
+        - policies: replacement of each category, either letters (the letters of
+        the allocator, as replace_person_entities), '[...]' or the label,
+        e.g. {'personnePhysique': 'letters', 'adresse': '[...]'}
+        - offset_map: if given, filled with the segments of the rendered text
+        """
+        return "".join(self._render_chunks(policies, offset_map))
+
+    def render_to(
+        self,
+        stream: Any,
+        policies: dict[Union[CategoryEnum, str], Union[ReplacementEnum, str]],
+        offset_map: Optional[OffsetMap] = None,
+        chunk_size: int = 1 << 16,
+        encoding: str = "utf-8",
+    ) -> int:
+        """
+        This function writes the text rendered by render to a stream, chunk by
+        chunk, without building the whole rendered text
+        Inputs:
+        - stream: socket, binary file object (an io binary stream or any object
+        whose mode contains 'b') or else any object with a write method taking str
+        - policies: replacement of each category, see render
+        - offset_map: if given, filled with the segments of the rendered text
+        - chunk_size: number of characters written at once
+        - encoding: encoding of the text written to binary streams and sockets
+        Returns the number of characters of the rendered text
+        """
+        if hasattr(stream, "sendall"):
+
+            def write(chunk: str):
+                stream.sendall(chunk.encode(encoding))
+
+        elif isinstance(stream, (io.RawIOBase, io.BufferedIOBase)) or "b" in getattr(stream, "mode", ""):
+
+            def write(chunk: str):
+                stream.write(chunk.encode(encoding))
+
+        else:
+            write = stream.write
+
+        n_characters = 0
+        buffer = []
+        buffer_size = 0
+        for chunk in self._render_chunks(policies, offset_map, chunk_size):
+            buffer.append(chunk)
+            buffer_size += len(chunk)
+            if buffer_size >= chunk_size:
+                write("".join(buffer))
+                n_characters += buffer_size
+                buffer = []
+                buffer_size = 0
+        if buffer:
+            write("".join(buffer))
+            n_characters += buffer_size
+        return n_characters
+
+    def _render_chunks(
+        self,
+        policies: dict[Union[CategoryEnum, str], Union[ReplacementEnum, str]],
+        offset_map: Optional[OffsetMap] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[str]:
+        """
+        This function yields the consecutive pieces of the rendered text,
+        slices of the original text and replacements
+        Inputs:
+        - chunk_size: if given, the slices of the original text are cut into
+        pieces of at most chunk_size characters
+        """
+        replacements = {CategoryEnum(category).value: ReplacementEnum(policy) for category, policy in policies.items()}
+        position = 0
+        output_position = 0
+        for start, end, entity in self._replaced_spans(replacements):
+            policy = replacements[entity.label.value]
+            if policy is ReplacementEnum.letters:
+                replacement = self.allocator[entity.text]
+            elif policy is ReplacementEnum.ellipsis:
+                replacement = "[...]"
+            else:
+                replacement = f"[{entity.label.value}]"
+
+            if start > position:
+                if offset_map is not None:
+                    offset_map.add_segment(output_position, position, start, False)
+                output_position += start - position
+                yield from self._slices(position, start, chunk_size)
+            if offset_map is not None:
+                offset_map.add_segment(output_position, start, end, True)
+            output_position += len(replacement)
+            yield replacement
+            position = end
+
+        if position < len(self.text):
+            if offset_map is not None:
+                offset_map.add_segment(output_position, position, len(self.text), False)
+            yield from self._slices(position, len(self.text), chunk_size)
+
+    def _replaced_spans(self, replacements: dict[str, ReplacementEnum]) -> Iterator[tuple[int, int, NamedEntity]]:
+        """
+        This function yields the spans of the text to replace, with the entity
+        giving their replacement. Overlapping entities are merged into a single
+        span, replaced if one of them has a replacement, so that no part of an
+        entity is left in clear next to a replaced one. The replacement is the
+        one of the first entity having one, the longest one for a same start.
+        Inputs:
+        - replacements: replacement of each category value
+        """
+        start = end = 0
+        replaced_entity = None
+        for entity in sorted(self.entities, key=_start_longest_first):
+            if entity.start >= end:
+                if replaced_entity is not None:
+                    yield start, end, replaced_entity
+                start, end, replaced_entity = entity.start, entity.end, None
+            else:
+                end = max(end, entity.end)
+            if replaced_entity is None and entity.label.value in replacements:
+                replaced_entity = entity
+        if replaced_entity is not None:
+            yield start, end, replaced_entity
+
+    def _slices(self, start: int, end: int, chunk_size: Optional[int]) -> Iterator[str]:
+        """
+        This function yields the original text from start to end, in pieces
+        of at most chunk_size characters
+        """
+        if chunk_size is None:
+            yield self.text[start:end]
+            return
+        for chunk_start in range(start, end, chunk_size):
+            yield self.text[chunk_start : min(chunk_start + chunk_size, end)]
 
     def _ordered_entities(self, reverse=False):
         """
@@ -122,8 +327,8 @@ class Anonymizer:
         - reverse: if true, get order entities in reverse order
         """
         if reverse:
-            return sorted(self.entities, key=itemgetter("start"), reverse=True)
-        return sorted(self.entities, key=itemgetter("start"))
+            return sorted(self.entities, key=attrgetter("start"), reverse=True)
+        return sorted(self.entities, key=attrgetter("start"))
 
     @staticmethod
     def _instantiate_flashtext(case_sensitive: bool):
@@ -150,7 +355,9 @@ class Anonymizer:
             "Ü",
             "-",
         ]
-        keyword_processor = KeywordProcessor(case_sensitive)
-        for non_word in non_word_boundary_list:
-            keyword_processor.add_non_word_boundary(non_word)
-        return keyword_processor
+        return instantiate_flashtext(case_sensitive, non_word_boundaries=non_word_boundary_list)
+
+
+def _start_longest_first(entity: NamedEntity) -> tuple[int, int]:
+    """Sorts the entities by start, the longest first for a same start"""
+    return entity.start, -entity.end
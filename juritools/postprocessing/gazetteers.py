@@ -0,0 +1,287 @@
+import gc
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+import pkg_resources
+
+from juritools.utils import KeywordMatcher, deaccent, instantiate_flashtext
+
+logger = logging.getLogger(__name__)
+
+# bump when the way the gazetteers are built changes
+ARTIFACT_VERSION = 2
+# artifact shipped with the package, written at packaging time only
+ARTIFACT_PATH = pkg_resources.resource_filename(__name__, "data/gazetteers.pkl")
+# artifact written on first use when the package ships none, in the cache directory of the user
+CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "juritools",
+    "gazetteers.pkl",
+)
+# gazetteers stored in the artifact, with the data files they are built from
+ARTIFACT_SOURCES = {
+    "cities": "data/communes.csv",
+    "facilities": "data/etablissements.txt",
+    "voies": "data/NATURE_VOIE.csv",
+}
+
+# builders of the gazetteers, by name
+_BUILDERS: dict[str, Callable[[], KeywordMatcher]] = {}
+# gazetteers already built in the current process, by name
+_GAZETTEERS: dict[str, KeywordMatcher] = {}
+_LOCK = threading.Lock()
+
+
+def register_gazetteer(name: str):
+    """Decorator registering the builder of a gazetteer
+
+    The builder is called at most once per process, the first time the
+    gazetteer is requested with `get_gazetteer` or built by `warmup`.
+
+    Args:
+        name (str): name of the gazetteer
+    """
+
+    def decorator(builder: Callable[[], KeywordMatcher]):
+        _BUILDERS[name] = builder
+        return builder
+
+    return decorator
+
+
+def get_gazetteer(name: str) -> KeywordMatcher:
+    """Returns the keyword processor of a gazetteer, building it if needed
+
+    The keyword processor is shared by every caller of the process and
+    must not be modified.
+
+    Args:
+        name (str): name of the gazetteer
+
+    Raises:
+        KeyError: if no gazetteer is registered under this name
+
+    Returns:
+        KeywordMatcher: the keyword matcher of the gazetteer
+    """
+    try:
+        return _GAZETTEERS[name]
+    except KeyError:
+        pass
+    with _LOCK:
+        if name not in _GAZETTEERS:
+            if name in ARTIFACT_SOURCES:
+                _GAZETTEERS.update(_load_or_build_artifact())
+            else:
+                _GAZETTEERS[name] = _BUILDERS[name]()
+        return _GAZETTEERS[name]
+
+
+def warmup(names: Optional[Iterable[str]] = None):
+    """Builds the gazetteers ahead of time, e.g. at server startup
+
+    Args:
+        names (Iterable[str], optional): names of the gazetteers to build.
+            Defaults to all registered gazetteers.
+    """
+    for name in list(_BUILDERS) if names is None else names:
+        get_gazetteer(name)
+
+
+def clear_gazetteers():
+    """Drops the gazetteers built in the current process"""
+    with _LOCK:
+        _GAZETTEERS.clear()
+
+
+def source_checksum() -> str:
+    """Returns the checksum of the data files the artifact is built from
+
+    The version of the artifact format is part of the checksum, so that an
+    artifact written by an older version of the builders is never reused.
+
+    Returns:
+        str: sha256 hexadecimal digest
+    """
+    checksum = hashlib.sha256(f"v{ARTIFACT_VERSION}".encode())
+    for name, source in sorted(ARTIFACT_SOURCES.items()):
+        checksum.update(name.encode())
+        checksum.update(pkg_resources.resource_string(__name__, source))
+    return checksum.hexdigest()
+
+
+def build_artifact(path: str = ARTIFACT_PATH) -> dict[str, KeywordMatcher]:
+    """Builds the gazetteers from the data files and serializes them
+
+    Args:
+        path (str, optional): file to write. Defaults to ARTIFACT_PATH.
+
+    Returns:
+        dict[str, KeywordMatcher]: the gazetteers stored in the artifact
+    """
+    gazetteers = {name: _BUILDERS[name]() for name in ARTIFACT_SOURCES}
+    write_artifact(gazetteers, path)
+    return gazetteers
+
+
+def write_artifact(gazetteers: dict[str, KeywordMatcher], path: str):
+    """Serializes gazetteers built from the data files
+
+    Args:
+        gazetteers (dict[str, KeywordMatcher]): the gazetteers of ARTIFACT_SOURCES
+        path (str): file to write, its directory is created if needed
+
+    Raises:
+        OSError: if the file cannot be written
+    """
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "checksum": source_checksum(),
+        "gazetteers": gazetteers,
+    }
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    # write to a temporary file first so that concurrent readers never see a partial artifact
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            pickle.dump(artifact, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_artifact(path: str = ARTIFACT_PATH) -> Optional[dict[str, KeywordMatcher]]:
+    """Loads the serialized gazetteers
+
+    Args:
+        path (str, optional): file to read. Defaults to ARTIFACT_PATH.
+
+    Returns:
+        Optional[dict[str, KeywordMatcher]]: the gazetteers, or None if the
+            artifact is missing, unreadable or stale
+    """
+    # the tries are made of many small dicts: the garbage collector would
+    # otherwise run repeatedly while they are created
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, "rb") as file:
+            artifact = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+    if (
+        not isinstance(artifact, dict)
+        or artifact.get("version") != ARTIFACT_VERSION
+        or artifact.get("checksum") != source_checksum()
+    ):
+        return None
+    return artifact["gazetteers"]
+
+
+def _load_or_build_artifact() -> dict[str, KeywordMatcher]:
+    """Loads the artifact shipped with the package or cached by a previous process
+
+    When both are missing or stale, the gazetteers are built and cached in
+    CACHE_PATH. The package directory itself is never written.
+    """
+    for path in (ARTIFACT_PATH, CACHE_PATH):
+        if (gazetteers := load_artifact(path)) is not None:
+            return gazetteers
+    logger.info("Gazetteer artifact missing or stale, rebuilding %s", CACHE_PATH)
+    gazetteers = {name: _BUILDERS[name]() for name in ARTIFACT_SOURCES}
+    try:
+        write_artifact(gazetteers, CACHE_PATH)
+    except OSError as error:
+        # e.g. no writable home directory: keep the gazetteers in memory only
+        logger.warning("Gazetteer artifact not cached in %s: %s", CACHE_PATH, error)
+    return gazetteers
+
+
+@register_gazetteer("cities")
+def _build_cities() -> KeywordMatcher:
+    """French cities, deaccented, in their normal and upper case spellings"""
+    cities = pd.read_csv(pkg_resources.resource_stream(__name__, "data/communes.csv"))
+    names = cities.nom_commune_complet.str.replace("-", " ")
+    keyword_cities = instantiate_flashtext(True)
+    keyword_cities.add_keywords_from_list(list(set(names.apply(deaccent).values)))
+    keyword_cities.add_keywords_from_list(list(set(names.str.upper().apply(deaccent).values)))
+    return keyword_cities
+
+
+@register_gazetteer("facilities")
+def _build_facilities() -> KeywordMatcher:
+    """Facilities such as hospitals, schools or prisons"""
+    facilities = pd.read_csv(pkg_resources.resource_stream(__name__, "data/etablissements.txt"))
+    keyword_facilities = instantiate_flashtext(False)
+    keyword_facilities.add_keywords_from_list(list(facilities.etablissement.values))
+    return keyword_facilities
+
+
+@register_gazetteer("voies")
+def _build_voies() -> KeywordMatcher:
+    """Street types (rue, avenue, boulevard...)"""
+    voies = pd.read_csv(pkg_resources.resource_stream(__name__, "data/NATURE_VOIE.csv"))
+    keyword_voies = instantiate_flashtext(False)
+    keyword_voies.add_keywords_from_list(list(set(voies.voie.values)))
+    return keyword_voies
+
+
+@register_gazetteer("no_cities")
+def _build_no_cities() -> KeywordMatcher:
+    """Keywords we do not want in the same sentence of a city"""
+    keywords_no_cities = instantiate_flashtext(False)
+    keywords_no_cities.add_keywords_from_list(
+        [
+            "tribunal",
+            "SCI",
+            "SCP",
+            "cour d'appel",
+            "arrêt attaqué",
+            "barreau",
+            "registre",
+            "conseil de prud'hommes",
+            "palais",
+        ]
+    )
+    return keywords_no_cities
+
+
+@register_gazetteer("compte_bancaire")
+def _build_compte_bancaire() -> KeywordMatcher:
+    """Keywords introducing a bank account number"""
+    keyword_compte_bancaire = instantiate_flashtext(False)
+    keyword_compte_bancaire.add_keywords_from_list(
+        ["compte bancaire", "livret A", "compte courant", "compte de depot"]
+    )
+    return keyword_compte_bancaire
+
+
+@register_gazetteer("find_context")
+def _build_find_context() -> KeywordMatcher:
+    """Keywords giving the context of an identifier, mapped to its kind"""
+    keyword_find_context = instantiate_flashtext(False)
+    keyword_find_context.add_keywords_from_dict(
+        {
+            "ti": ["travailleur independant"],
+            "phone": ["portable", "tel", "tel.", "telephone", "mobile"],
+            "cni": ["carte d'identite", "carte nationale d'identite", "cni"],
+            "sejour": ["carte de sejour", "titre de sejour", "visa long sejour", "AGDREF"],
+            "clef_bdf": ["clef Banque de France", "clef BDF", "clé Banque de France", "clé BDF"],
+            "siren_siret": ["siren", "siret", "RCS"],
+        }
+    )
+    return keyword_find_context
+
+
+if __name__ == "__main__":
+    build_artifact()
+    print(f"Gazetteer artifact written to {ARTIFACT_PATH}")
@@ -5,6 +5,7 @@ import heapq
 import pandas as pd
 
 from juritools.type import CategoryEnum, NamedEntity
+from juritools.utils import IntervalIndex
 
 
 class PostProcess:
@@ -24,6 +25,7 @@ class PostProcess:
             self.start_ents.append(e.start)
             self.end_ents.append(e.end)
             self.entities_by_category[e.label].append(e)
+        self.interval_index = IntervalIndex(zip(self.start_ents, self.end_ents))
 
         self.checklist = checklist
         self.metadata = metadata
@@ -73,6 +75,7 @@ class PostProcess:
         self.entities_by_category = entities_by_category
         self.start_ents = entities_starts
         self.end_ents = entities_ends
+        self.interval_index = IntervalIndex(zip(self.start_ents, self.end_ents))
 
     def ordered_entities(self, reverse=False):
         """
@@ -161,22 +164,14 @@ class PostProcess:
             start_new_entity (int): Start index of the new entity
             end_new_entity (int): End index of the next entity
         """
-        if start_new_entity in self.start_ents or end_new_entity in self.end_ents:
-            return False
-        check = not any(
-            start <= start_new_entity < end
-            or start < end_new_entity <= end
-            or start_new_entity <= start <= end_new_entity
-            for start, end in zip(self.start_ents, self.end_ents)
-        )
-
-        return check
+        return not self.interval_index.overlaps(start_new_entity, end_new_entity)
 
     def insert_entity(self, entity: NamedEntity):
         index = bisect.bisect(self.entities, entity)
         self.entities.insert(index, entity)
         self.start_ents.insert(index, entity.start)
         self.end_ents.insert(index, entity.end)
+        self.interval_index.add(entity.start, entity.end)
         if entity.label not in self.entities_by_category:
             self.entities_by_category[entity.label] = [entity]
         else:
@@ -184,7 +179,49 @@ class PostProcess:
             self.entities_by_category[entity.label].insert(category_index, entity)
 
     def delete_entity(self, entity: NamedEntity):
-        self.entities.remove(entity)
-        self.entities_by_category[entity.label].remove(entity)
-        self.start_ents.remove(entity.start)
-        self.end_ents.remove(entity.end)
+        """
+        This function deletes an entity and its start and end indexes
+
+        The entity is looked up by identity, so that an equal entity or a
+        duplicated offset belonging to another entity is never removed instead.
+        """
+        index = self._find_entity(self.entities, entity)
+        del self.entities[index]
+        start, end = self.start_ents.pop(index), self.end_ents.pop(index)
+        self.interval_index.discard(start, end)
+
+        # the label of the entity may have been changed since it was inserted
+        category_entities = self.entities_by_category.get(entity.label, [])
+        try:
+            del category_entities[self._find_entity(category_entities, entity)]
+        except ValueError:
+            for category_entities in self.entities_by_category.values():
+                if any(other is entity for other in category_entities):
+                    del category_entities[self._find_entity(category_entities, entity)]
+                    break
+
+    @staticmethod
+    def _find_entity(entities: list[NamedEntity], entity: NamedEntity) -> int:
+        """
+        This function returns the position of an entity in a list sorted by start index
+
+        Args:
+            entities (list[NamedEntity]): list to search
+            entity (NamedEntity): entity to find, compared by identity
+
+        Raises:
+            ValueError: if neither the entity nor an equal entity is in the list
+
+        Returns:
+            int: position of the entity
+        """
+        for index in range(bisect.bisect_left(entities, entity), len(entities)):
+            if entities[index] is entity:
+                return index
+            if entities[index].start != entity.start:
+                break
+        # the list is not sorted anymore, e.g. the entity has been modified in place
+        for index, other in enumerate(entities):
+            if other is entity:
+                return index
+        return entities.index(entity)
@@ -1,16 +1,19 @@
 import itertools
+import logging
 import re
 from collections import Counter
 
 import pandas as pd
-import pkg_resources
 from flair.data import Sentence
 
 from juritools.postprocessing import PostProcess
+from juritools.postprocessing.gazetteers import get_gazetteer
 from juritools.type import CategoryEnum, Check, CheckTypeEnum, NamedEntity, PostProcessOutput, SourceEnum
-from juritools.utils import azerty_levenshtein_similarity, deaccent, instantiate_flashtext
+from juritools.utils import azerty_levenshtein_similar_pairs, deaccent, instantiate_flashtext
 from jurispacy_tokenizer import JuriSpacyTokenizer
 
+logger = logging.getLogger(__name__)
+
 
 class PostProcessFromEntities(PostProcess):
     def __init__(
@@ -22,9 +25,9 @@ class PostProcessFromEntities(PostProcess):
     ):
         super().__init__(entities, checklist, metadata)
         self.tokenizer = tokenizer
-        self.voies = pd.read_csv(pkg_resources.resource_stream(__name__, "data/NATURE_VOIE.csv"))
-        self.keyword_voies = instantiate_flashtext(False)
-        self.keyword_voies.add_keywords_from_list(list(set(self.voies.voie.values)))
+        self.keyword_voies = get_gazetteer("voies")
+        # number of pairs of entities check_similarities did not need to compare
+        self.similarity_pruned_pairs = 0
 
     def split_entity_multi_toks(
         self,
@@ -60,7 +63,7 @@ class PostProcessFromEntities(PostProcess):
                 self.delete_entity(entity)
 
                 for token in tokens:
-                    new_entity = NamedEntity(
+                    new_entity = NamedEntity.fast_construct(
                         text=token.text,
                         start=entity.start + token.start_position,
                         label=label,
@@ -172,10 +175,9 @@ class PostProcessFromEntities(PostProcess):
 
             for text, start_match, end_match in keywords.extract_keywords(entity.text, span_info=True):
                 entities_to_add.append(
-                    NamedEntity(
+                    NamedEntity.fast_construct(
                         text=text,
                         start=entity.start + start_match,
-                        end=entity.start + end_match,
                         label=CategoryEnum.personnePhysique,
                         source="postprocess",
                     )
@@ -350,12 +352,22 @@ class PostProcessFromEntities(PostProcess):
         check_entities = {}
         c = Counter()
         for entity in self.entities_by_category[category]:
-            c[deaccent(entity.text.lower())] += 1
-            if deaccent(entity.text.lower()) not in check_entities:
-                check_entities[deaccent(entity.text.lower())] = entity
-        for ent1, ent2 in itertools.combinations(check_entities, 2):
-            similarity = azerty_levenshtein_similarity(check_entities[ent1].text, check_entities[ent2].text)
-            if (similarity > ratio_threshold) and (c[ent1] == 1 or c[ent2] == 1):
+            deaccented_lower_text = deaccent(entity.text.lower())
+            c[deaccented_lower_text] += 1
+            if deaccented_lower_text not in check_entities:
+                check_entities[deaccented_lower_text] = entity
+        keys = list(check_entities)
+        similar_pairs, self.similarity_pruned_pairs = azerty_levenshtein_similar_pairs(
+            [check_entities[key].text for key in keys], ratio_threshold
+        )
+        logger.debug(
+            "check_similarities: %d pairs pruned out of %d",
+            self.similarity_pruned_pairs,
+            len(keys) * (len(keys) - 1) // 2,
+        )
+        for i, j in similar_pairs:
+            ent1, ent2 = keys[i], keys[j]
+            if c[ent1] == 1 or c[ent2] == 1:
                 similar_entities.append((check_entities[ent1], check_entities[ent2]))
 
         for ent1, ent2 in similar_entities:
@@ -1,66 +1,159 @@
+import bisect
+import itertools
 import re
+from typing import Optional, Union
 
+import numpy as np
 import pandas as pd
-import pkg_resources
-from flair.data import Sentence, Span
+from flair.data import Sentence
 
 from juritools.postprocessing import PostProcess
+from juritools.postprocessing.gazetteers import get_gazetteer
+from juritools.postprocessing.token_table import IS_ALPHA, IS_CIVILITY, IS_TITLE, IS_UPPER, TokenTable
 from juritools.type import CategoryEnum, Check, NamedEntity, PostProcessOutput, SentenceIndexes, SourceEnum
 from juritools.utils import deaccent, instantiate_flashtext
 from juritools.utils.regular_expressions import PRO_TO_PHYSIQUE_RE
 
+# keyword processors applied on each sentence, by gazetteer name
+SENTENCE_GAZETTEERS = {
+    "cities": "keyword_cities",
+    "no_cities": "keywords_no_cities",
+    "facilities": "keyword_facilities",
+    "find_context": "keyword_find_context",
+    "compte_bancaire": "keyword_compte_bancaire",
+}
+# separator of the sentences when the keyword processors are applied on the whole document
+DOCUMENT_SEPARATOR = "\x00"
+
 
 class PostProcessFromSents(PostProcess):
     def __init__(
         self,
-        flair_sentences: list[Sentence],
+        flair_sentences: Union[list[Sentence], TokenTable],
         entities: list[NamedEntity],
         checklist: list[str],
         metadata: pd.core.frame.DataFrame = None,
     ):
         super().__init__(entities, checklist, metadata)
-        self.sentences = flair_sentences
-        self.cities = pd.read_csv(pkg_resources.resource_stream(__name__, "data/communes.csv"))
-        self.cities.nom_commune_complet = self.cities.nom_commune_complet.str.replace("-", " ")
-        self.keyword_cities = instantiate_flashtext(True)
-        self.keyword_cities.add_keywords_from_list(list(set(self.cities.nom_commune_complet.apply(deaccent).values)))
-        self.keyword_cities.add_keywords_from_list(
-            list(set(self.cities.nom_commune_complet.str.upper().apply(deaccent).values))
-        )
-        self.keywords_no_cities = instantiate_flashtext(False)
+        # the methods run on the table of the sentences, the flair sentences,
+        # if given, are only kept up to date by match_against_case
+        if isinstance(flair_sentences, TokenTable):
+            self.sentences = None
+            self.table = flair_sentences
+        else:
+            self.sentences = flair_sentences
+            self.table = TokenTable.from_flair_sentences(flair_sentences)
+        self.keyword_cities = get_gazetteer("cities")
         # List of keywords we do not want in the same sentence of a city
-        self.keywords_no_cities.add_keywords_from_list(
-            [
-                "tribunal",
-                "SCI",
-                "SCP",
-                "cour d'appel",
-                "arrêt attaqué",
-                "barreau",
-                "registre",
-                "conseil de prud'hommes",
-                "palais",
-            ]
-        )
-        self.facilities = pd.read_csv(pkg_resources.resource_stream(__name__, "data/etablissements.txt"))
-        self.keyword_facilities = instantiate_flashtext(False)
-        self.keyword_facilities.add_keywords_from_list(list(self.facilities.etablissement.values))
-        self.keyword_compte_bancaire = instantiate_flashtext(False)
-        self.keyword_compte_bancaire.add_keywords_from_list(
-            ["compte bancaire", "livret A", "compte courant", "compte de depot"]
-        )
-
-        self.keyword_find_context = instantiate_flashtext(False)
-        self.keyword_find_context.add_keywords_from_dict(
-            {
-                "ti": ["travailleur independant"],
-                "phone": ["portable", "tel", "tel.", "telephone", "mobile"],
-                "cni": ["carte d'identite", "carte nationale d'identite", "cni"],
-                "sejour": ["carte de sejour", "titre de sejour", "visa long sejour", "AGDREF"],
-                "clef_bdf": ["clef Banque de France", "clef BDF", "clé Banque de France", "clé BDF"],
-                "siren_siret": ["siren", "siret", "RCS"],
-            }
-        )
+        self.keywords_no_cities = get_gazetteer("no_cities")
+        self.keyword_facilities = get_gazetteer("facilities")
+        self.keyword_compte_bancaire = get_gazetteer("compte_bancaire")
+        self.keyword_find_context = get_gazetteer("find_context")
+        # last sentence deaccented, shared by the methods applied on it
+        self._deaccented_sentence = ("", "")
+        # keywords of the current sentence, found over the whole document
+        # by apply_methods(document_level=True)
+        self._sentence_keywords: Optional[tuple[str, list[str], dict[str, list[tuple[str, int, int]]]]] = None
+
+    def _sentence_index(self, sentence: Union[Sentence, int]) -> int:
+        """
+        This function returns the index of a sentence in the table, the sentence
+        being either one of the flair sentences of the decision or its index
+        """
+        if not isinstance(sentence, Sentence):
+            return sentence
+        for index_sentence, flair_sentence in enumerate(self.sentences or []):
+            if flair_sentence is sentence:
+                return index_sentence
+        raise ValueError("The sentence is not one of the flair sentences of the decision")
+
+    def _deaccent_sentence(self, sent_string: str) -> str:
+        """
+        This function returns the deaccented sentence, computed only once
+        when several methods are applied on the same sentence
+        """
+        if sent_string != self._deaccented_sentence[0]:
+            self._deaccented_sentence = (sent_string, deaccent(sent_string))
+        return self._deaccented_sentence[1]
+
+    def _keyword_text(self, gazetteer: str, sent_string: str) -> str:
+        """
+        This function returns the text on which the keyword processor of a
+        gazetteer is applied, keeping the offsets of sent_string
+        """
+        if gazetteer == "no_cities":
+            return sent_string
+        elif gazetteer == "cities":
+            return self._deaccent_sentence(sent_string).replace("-", " ")
+        return self._deaccent_sentence(sent_string)
+
+    def _extract_keywords(self, gazetteer: str, sent_string: str) -> list[tuple[str, int, int]]:
+        """
+        This function returns the keywords of a gazetteer found in a sentence,
+        with their start and end indexes in the sentence
+
+        Args:
+            gazetteer (str): name of the gazetteer, see SENTENCE_GAZETTEERS
+            sent_string (str): string of the sentence
+
+        Returns:
+            list[tuple[str, int, int]]: keywords found with their indexes
+        """
+        if self._sentence_keywords is not None:
+            keywords_sent_string, gazetteers, keywords = self._sentence_keywords
+            if gazetteer in gazetteers and keywords_sent_string == sent_string:
+                return keywords.get(gazetteer, [])
+        keyword_processor = getattr(self, SENTENCE_GAZETTEERS[gazetteer])
+        return keyword_processor.extract_keywords(self._keyword_text(gazetteer, sent_string), span_info=True)
+
+    def _extract_document_keywords(
+        self,
+        sent_strings: list[str],
+        gazetteers: list[str],
+    ) -> list[Optional[dict[str, list[tuple[str, int, int]]]]]:
+        """
+        This function runs each keyword processor once over the whole document
+        and returns the keywords found in each sentence, as _extract_keywords
+        would have found them sentence by sentence
+
+        Args:
+            sent_strings (list[str]): strings of the sentences
+            gazetteers (list[str]): names of the gazetteers to apply
+
+        Returns:
+            list[Optional[dict[str, list[tuple[str, int, int]]]]]: keywords found
+                in each sentence by gazetteer, with their indexes in the sentence,
+                or None if no keyword was found in the sentence
+        """
+        # the separator is neither a word character nor a space,
+        # so that no keyword can be found across two sentences
+        document = DOCUMENT_SEPARATOR.join(sent_strings)
+        sentence_starts = list(itertools.accumulate((len(s) + 1 for s in sent_strings[:-1]), initial=0))
+        keywords_by_sentence = [None] * len(sent_strings)
+
+        for gazetteer in gazetteers:
+            keyword_processor = getattr(self, SENTENCE_GAZETTEERS[gazetteer])
+            text = self._keyword_text(gazetteer, document)
+            if not keyword_processor.case_sensitive and len(text.lower()) != len(text):
+                # lowercasing would shift the offsets of the following sentences
+                for index_sentence, sent_string in enumerate(sent_strings):
+                    if keywords := keyword_processor.extract_keywords(
+                        self._keyword_text(gazetteer, sent_string), span_info=True
+                    ):
+                        if keywords_by_sentence[index_sentence] is None:
+                            keywords_by_sentence[index_sentence] = {}
+                        keywords_by_sentence[index_sentence][gazetteer] = keywords
+                continue
+            for keyword, start, end in keyword_processor.extract_keywords(text, span_info=True):
+                index_sentence = bisect.bisect_right(sentence_starts, start) - 1
+                start_sentence = sentence_starts[index_sentence]
+                if keywords_by_sentence[index_sentence] is None:
+                    keywords_by_sentence[index_sentence] = {}
+                keywords_by_sentence[index_sentence].setdefault(gazetteer, []).append(
+                    (keyword, start - start_sentence, end - start_sentence)
+                )
+
+        return keywords_by_sentence
 
     def match_against_case(
         self,
@@ -70,22 +163,32 @@ class PostProcessFromSents(PostProcess):
         output = PostProcessOutput()
 
         if sent_string.lower() == "c/":
+            table = self.table
             index_c = index_sentence
             if index_c > 1:
-                against_sents = self.sentences[index_c - 2 : index_c + 3]
+                against_sents = range(len(table))[index_c - 2 : index_c + 3]
             else:
-                against_sents = self.sentences[index_c - 1 : index_c + 2]
-            for sent in against_sents:
-                for span in sent.get_spans("ner"):
-                    if "professionnel" in span.tag or ("adresse" in span.tag and len(span) < 3):
-                        span.set_label("ner", "personnePhysique")
+                against_sents = range(len(table))[index_c - 1 : index_c + 2]
+            for index_against in against_sents:
+                end_sentence = table.sentence_ends[index_against]
+                for index_span in table.sentence_spans(index_against):
+                    tag = table.span_tag(index_span)
+                    span_length = table.span_token_ends[index_span] - table.span_token_starts[index_span]
+                    if "professionnel" in tag or ("adresse" in tag and span_length < 3):
+                        table.set_span_tag(index_span, "personnePhysique")
+                        if self.sentences is not None:
+                            flair_span = self.sentences[index_against].get_spans("ner")[
+                                index_span - table.span_bounds[index_against]
+                            ]
+                            flair_span.set_label("ner", "personnePhysique")
+                        start_span = table.token_starts[table.span_token_starts[index_span]]
                         for entity in self.entities:
-                            if entity.start == span.start_position:
+                            if entity.start == start_span:
                                 entity.label = CategoryEnum.personnePhysique
                                 entity.source = SourceEnum.post_process
                                 output.add_modified_entity(entity)
 
-                            if entity.start > sent.end_position:
+                            if entity.start > end_sentence:
                                 break
 
         return output
@@ -104,10 +207,9 @@ class PostProcessFromSents(PostProcess):
             end_new_entity = idx_start_sentence + match.end()
 
             if self.check_overlap_entities_from_index(start_new_entity, end_new_entity):
-                new_entity = NamedEntity(
+                new_entity = NamedEntity.fast_construct(
                     text=match.group(),
                     start=start_new_entity,
-                    end=end_new_entity,
                     label="localite",
                     source="postprocess",
                 )
@@ -128,15 +230,13 @@ class PostProcessFromSents(PostProcess):
         output = PostProcessOutput()
 
         # Search if a city is in the sentence
-        cities_found = self.keyword_cities.extract_keywords(
-            deaccent(sent_string.replace("-", " ")),
-            span_info=True,
-        )
+        deaccented_sentence = self._deaccent_sentence(sent_string).replace("-", " ")
+        cities_found = self._extract_keywords("cities", sent_string)
         # Search if a specific keyword that discard the sentence is in it
-        no_cities_found = self.keywords_no_cities.extract_keywords(sent_string)
+        no_cities_found = self._extract_keywords("no_cities", sent_string)
         if not no_cities_found and cities_found:
             for keyword, start_keyword, end_keyword in cities_found:
-                if deaccent(sent_string).replace("-", " ").startswith(keyword):
+                if deaccented_sentence.startswith(keyword):
                     continue
 
                 start_new_entity = idx_start_sentence + start_keyword
@@ -152,10 +252,9 @@ class PostProcessFromSents(PostProcess):
                     )
                     output.merge_output(postal_code_output)
 
-                    new_entity = NamedEntity(
+                    new_entity = NamedEntity.fast_construct(
                         text=sent_string[start_keyword:end_keyword],
                         start=start_new_entity,
-                        end=end_new_entity,
                         label="localite",
                         source="postprocess",
                     )
@@ -188,10 +287,9 @@ class PostProcessFromSents(PostProcess):
                 for match, start, end in keywords.extract_keywords(entity.text, span_info=True):
                     to_delete = True
 
-                    new_entity = NamedEntity(
+                    new_entity = NamedEntity.fast_construct(
                         text=match[0],
                         start=entity.start + start,
-                        end=entity.start + end,
                         label=match[1],
                         source="postprocess",
                     )
@@ -209,7 +307,7 @@ class PostProcessFromSents(PostProcess):
 
     def match_facilities(
         self,
-        sentence: Sentence,
+        sentence: Union[Sentence, int],
         sent_string: str,
         idx_start_sentence: int,
     ) -> PostProcessOutput:
@@ -218,56 +316,44 @@ class PostProcessFromSents(PostProcess):
         facilities like airports, schools, churchs and so on
         """
         output = PostProcessOutput()
-        match_facilities = []
-
-        if facilities_found := self.keyword_facilities.extract_keywords(deaccent(sent_string), span_info=True):
+        index_sentence = self._sentence_index(sentence)
+
+        if facilities_found := self._extract_keywords("facilities", sent_string):
+            table = self.table
+            first_token, end_token = table.sentence_tokens(index_sentence)
+            token_starts = table.token_starts[first_token:end_token]
+            casing = table.casing[first_token:end_token]
+            # capitalized tokens which are not a civility
+            capitalized = ((casing & (IS_TITLE | IS_UPPER)) != 0) & ((casing & IS_CIVILITY) == 0)
             for i, (_, _, end_keyword) in enumerate(facilities_found):
-                start_entity = None
-                end_entity = None
                 if len(facilities_found) > 1 and i < len(facilities_found) - 1:
                     start_next_match = idx_start_sentence + facilities_found[i + 1][1]
                 else:
                     start_next_match = None
-                possible_entity = next(
-                    (
-                        sentence[i_tok : i_tok + 5]
-                        for i_tok, token in enumerate(sentence)
-                        if (
-                            (token.start_position > idx_start_sentence + end_keyword)
-                            and (token.text.istitle() or token.text.isupper())
-                            and token.text not in ["Madame", "Monsieur", "M.", "Mme"]
-                        )
-                    ),
-                    [],
-                )
-
-                for i_tok, token in enumerate(possible_entity[::-1]):
-                    if start_next_match is not None and token.start_position >= start_next_match:
-                        continue
-                    if (token.text.istitle() or token.text.isupper()) and token.text not in [
-                        "Madame",
-                        "Monsieur",
-                        "M.",
-                        "Mme",
-                    ]:
-                        if i_tok == 0:
-                            span_entity = Span(possible_entity)
-                        else:
-                            span_entity = Span(possible_entity[:-i_tok])
-                        end_entity = token.start_position + len(token.text)
-                        start_entity = possible_entity[0].start_position
-                        break
+                # the name starts at the first capitalized token after the keyword
+                # and ends at the last capitalized token of the next five ones
+                candidates = np.flatnonzero(capitalized & (token_starts > idx_start_sentence + end_keyword))
+                if not candidates.size:
+                    continue
+                start_tok = candidates[0]
+                in_name = capitalized[start_tok : start_tok + 5]
+                if start_next_match is not None:
+                    in_name = in_name & (token_starts[start_tok : start_tok + 5] < start_next_match)
+                if not in_name.any():
+                    continue
+                end_tok = start_tok + np.flatnonzero(in_name)[-1] + 1
 
+                start_entity = int(token_starts[start_tok])
+                end_entity = int(table.token_ends[first_token + end_tok - 1])
                 if start_entity and end_entity and self.check_overlap_entities_from_index(start_entity, end_entity):
-                    new_entity = NamedEntity(
-                        text=span_entity.text.strip(),
+                    new_entity = NamedEntity.fast_construct(
+                        text=table.text(first_token + start_tok, first_token + end_tok),
                         start=start_entity,
                         label="etablissement",
                         source="postprocess",
                     )
                     self.insert_entity(new_entity)
                     output.add_added_entity(new_entity)
-                    match_facilities.append(span_entity.text.strip())
 
         return output
 
@@ -286,7 +372,7 @@ class PostProcessFromSents(PostProcess):
         regex_list = []
         group_dict = {}
         i = 0
-        context_keywords = list(set(self.keyword_find_context.extract_keywords(deaccent(sent_string))))
+        context_keywords = list(set(keyword for keyword, _, _ in self._extract_keywords("find_context", sent_string)))
         if not context_keywords:
             return output
         for keyword in set(context_keywords):
@@ -315,12 +401,12 @@ class PostProcessFromSents(PostProcess):
                 group_dict[i] = "numeroSiretSiren"
                 i += 1
 
-        for match in re.finditer(rf"{'|'.join(regex_list)}", deaccent(sent_string)):
+        for match in re.finditer(rf"{'|'.join(regex_list)}", self._deaccent_sentence(sent_string)):
             category = group_dict[match.groups().index(match.group())]
             start_new_entity = idx_start_sentence + match.start()
             end_new_entity = idx_start_sentence + match.end()
             if self.check_overlap_entities_from_index(start_new_entity, end_new_entity):
-                new_entity = NamedEntity(
+                new_entity = NamedEntity.fast_construct(
                     text=match.group(),
                     start=start_new_entity,
                     label=category,
@@ -333,7 +419,7 @@ class PostProcessFromSents(PostProcess):
 
     def change_pro_to_physique_no_context(
         self,
-        sentence: Sentence,
+        sentence: Union[Sentence, int],
         idx_start_sentence: int,
         idx_end_sentence: int,
     ) -> PostProcessOutput:
@@ -342,46 +428,40 @@ class PostProcessFromSents(PostProcess):
         only this entity in the sentence, no context
         """
         output = PostProcessOutput()
-        # Assign label to each token
-        # Ugly and temporary
-        for entity in sentence.get_spans("ner"):
-            prefix = "B-"
-            for token in entity:
-                token.set_label("ner", prefix + entity.tag, entity.score)
-                prefix = "I-"
-
-        changed_entities = []
-        for token in sentence:
-            if token.text.isalpha() and "professionnel" not in token.tag:
-                break
-        else:
+        index_sentence = self._sentence_index(sentence)
+
+        first_token, end_token = self.table.sentence_tokens(index_sentence)
+        alpha = (self.table.casing[first_token:end_token] & IS_ALPHA) != 0
+        professional = self.table.tag_mask("professionnel")[first_token:end_token]
+        # every word of the sentence belongs to a professional entity
+        if not (alpha & ~professional).any():
             for entity in self.entities:
                 if idx_start_sentence <= entity.start <= idx_end_sentence:
                     entity.label = CategoryEnum.personnePhysique
                     entity.source = SourceEnum.post_process
 
                     output.add_modified_entity(entity)
-                    changed_entities.append(entity.text)
 
         return output
 
     def check_compte_bancaire(
         self,
-        sentence: Sentence,
+        sentence: Union[Sentence, int],
         sent_string: str,
     ) -> PostProcessOutput:
         """
         This function checks if we miss entities from comptebancaire category
         """
         output = PostProcessOutput()
-        check_cb = []
-        start_sent = sentence[0].start_position
-        end_sent = sentence[-1].start_position + len(sentence[-1].text)
-        cb_found = self.keyword_compte_bancaire.extract_keywords(deaccent(sent_string), span_info=True)
+        index_sentence = self._sentence_index(sentence)
+        first_token, end_token = self.table.sentence_tokens(index_sentence)
+        start_sent = self.table.token_starts[first_token]
+        end_sent = self.table.token_ends[end_token - 1]
+        cb_found = self._extract_keywords("compte_bancaire", sent_string)
         if cb_found and re.search(r"\d{6,}", sent_string):
             add_check = not any(
                 start_sent <= entity.start <= end_sent and entity.label == CategoryEnum.compteBancaire
-                for entity in self.entities
+                for entity in self.entities_by_category[CategoryEnum.compteBancaire]
             )
 
             if add_check:
@@ -389,20 +469,19 @@ class PostProcessFromSents(PostProcess):
                     check_type="missing_bank_account",
                     sentences=[
                         SentenceIndexes(
-                            start=sentence.start_position,
-                            end=sentence.end_position,
+                            start=int(self.table.sentence_starts[index_sentence]),
+                            end=int(self.table.sentence_ends[index_sentence]),
                         )
                     ],
                 )
                 self.checklist.append(new_checklist)
                 output.add_added_checklist(new_checklist)
-                check_cb.append(sent_string)
 
         return output
 
     def change_pro_to_physique_with_context(
         self,
-        sentence: Sentence,
+        sentence: Union[Sentence, int],
         sent_string: str,
         regular_expressions: list = PRO_TO_PHYSIQUE_RE.values(),
         context_size: int = 60,
@@ -411,7 +490,7 @@ class PostProcessFromSents(PostProcess):
         if a regular expression is met in its context
 
         Args:
-            sentence (Sentence): sentence that should be scanned
+            sentence (Union[Sentence, int]): sentence that should be scanned, or its index
             sent_string (str): string of the sentence
             regular_expressions (list[str], optional): list of uncompiled regexes.
                 Defaults to list(PRO_TO_PHYSIQUE_RE.values()).
@@ -422,19 +501,22 @@ class PostProcessFromSents(PostProcess):
             list[NamedEntity]: list of changed named entities
         """
         output = PostProcessOutput()
+        index_sentence = self._sentence_index(sentence)
 
         regular_expressions = re.compile(rf"{'|'.join(regular_expressions)}")
 
         new_entities = []
 
         if regular_expressions.search(deaccent(sent_string.lower())):
+            start_sentence = int(self.table.sentence_starts[index_sentence])
+            end_sentence = int(self.table.sentence_ends[index_sentence])
             for entity in self.get_professional_entities():
-                if entity.start > sentence.end_position:
+                if entity.start > end_sentence:
                     break
-                elif entity.start >= sentence.start_position:
-                    entity_end = entity.end - sentence.start_position
+                elif entity.start >= start_sentence:
+                    entity_end = entity.end - start_sentence
 
-                    clean_context = deaccent(sent_string)[entity_end : entity_end + context_size].lower()
+                    clean_context = self._deaccent_sentence(sent_string)[entity_end : entity_end + context_size].lower()
 
                     if regular_expressions.search(clean_context):
                         entity.label = CategoryEnum.personnePhysique
@@ -453,48 +535,76 @@ class PostProcessFromSents(PostProcess):
         check_compte_bancaire=True,
         change_pro_no_context=True,
         change_pro_with_context=True,
+        document_level=False,
     ):
         """
         This function apply methods on the whole document
+        Inputs:
+        - document_level: if true, each keyword processor is applied once on the whole
+        document instead of once per sentence. The methods are still applied sentence
+        by sentence, in the same order, so the output is the same.
         """
         output = PostProcessOutput()
 
-        for i, sent in enumerate(self.sentences):
-            # Get position of the first word of the sentence in the whole document
-            if not sent:
-                continue
-            sent_string = sent.to_plain_string()
-            start_sentence = sent[0].start_position
-            if sent.start_position and sent.start_position > start_sentence:
-                start_sentence = sent.start_position
-            end_sentence = sent[-1].start_position + len(sent[-1].text)
-
-            if match_against:
-                new_output = self.match_against_case(sent_string, i)
-                output.merge_output(new_output)
+        table = self.table
+        sentences = [i for i in range(len(table)) if table.sentence_bounds[i + 1] > table.sentence_bounds[i]]
+        sent_strings = [table.sentence_strings[i] for i in sentences]
 
+        gazetteers = []
+        keywords_by_sentence = None
+        if document_level and sentences:
             if match_regex_with_context:
-                new_output = self.match_regex_with_context(sent_string, start_sentence)
-                output.merge_output(new_output)
-
+                gazetteers.append("find_context")
             if check_compte_bancaire:
-                new_output = self.check_compte_bancaire(sent, sent_string)
-                output.merge_output(new_output)
-
+                gazetteers.append("compte_bancaire")
             if match_cities:
-                new_output = self.match_cities(sent_string, start_sentence)
-                output.merge_output(new_output)
-
+                gazetteers.extend(["cities", "no_cities"])
             if match_facilities:
-                new_output = self.match_facilities(sent, sent_string, start_sentence)
-                output.merge_output(new_output)
-
-            if change_pro_no_context:
-                new_output = self.change_pro_to_physique_no_context(sent, start_sentence, end_sentence)
-                output.merge_output(new_output)
-
-            if change_pro_with_context:
-                new_output = self.change_pro_to_physique_with_context(sent, sent_string)
-                output.merge_output(new_output)
+                gazetteers.append("facilities")
+            keywords_by_sentence = self._extract_document_keywords(sent_strings, gazetteers)
+
+        try:
+            for index_string, i in enumerate(sentences):
+                sent_string = sent_strings[index_string]
+                # keywords found in the sentence, if they were searched in the whole document
+                sentence_keywords = None
+                if keywords_by_sentence is not None:
+                    sentence_keywords = keywords_by_sentence[index_string] or {}
+                    self._sentence_keywords = (sent_string, gazetteers, sentence_keywords)
+                # Get position of the first word of the sentence in the whole document
+                first_token, end_token = table.sentence_tokens(i)
+                start_sentence = max(int(table.token_starts[first_token]), int(table.sentence_starts[i]))
+                end_sentence = int(table.token_ends[end_token - 1])
+
+                if match_against:
+                    new_output = self.match_against_case(sent_string, i)
+                    output.merge_output(new_output)
+
+                # the following methods do nothing without keywords in the sentence
+                if match_regex_with_context and (sentence_keywords is None or "find_context" in sentence_keywords):
+                    new_output = self.match_regex_with_context(sent_string, start_sentence)
+                    output.merge_output(new_output)
+
+                if check_compte_bancaire and (sentence_keywords is None or "compte_bancaire" in sentence_keywords):
+                    new_output = self.check_compte_bancaire(i, sent_string)
+                    output.merge_output(new_output)
+
+                if match_cities and (sentence_keywords is None or "cities" in sentence_keywords):
+                    new_output = self.match_cities(sent_string, start_sentence)
+                    output.merge_output(new_output)
+
+                if match_facilities and (sentence_keywords is None or "facilities" in sentence_keywords):
+                    new_output = self.match_facilities(i, sent_string, start_sentence)
+                    output.merge_output(new_output)
+
+                if change_pro_no_context:
+                    new_output = self.change_pro_to_physique_no_context(i, start_sentence, end_sentence)
+                    output.merge_output(new_output)
+
+                if change_pro_with_context:
+                    new_output = self.change_pro_to_physique_with_context(i, sent_string)
+                    output.merge_output(new_output)
+        finally:
+            self._sentence_keywords = None
 
         return output
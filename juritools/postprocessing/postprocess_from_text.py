@@ -7,17 +7,17 @@ from luhn import verify
 from schwifty import IBAN
 
 from juritools.postprocessing import PostProcess
+from juritools.postprocessing.scanners import REGEXES, get_scanner, scan  # noqa: F401
 from juritools.type import CategoryEnum, Check, NamedEntity, PostProcessOutput, SourceEnum, merge_entities
 from juritools.utils import deaccent, instantiate_flashtext
 
-REGEXES = {
-    "email": r"(\b[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+\b)",
-    # numero_identifiant: insee|passport
-    "numero_identifiant": r"(\b(?:\d\s?(?:\d{2}\s?){3}(?:\d{3}\s?){2}(?:\d{2}|\d{0}))|(?:[0-9]{2}[A-z]{2}[0-9]{5})\b)",
-    "license_plate": r"(\b[A-Z]{2}-\d{3}-[A-Z]{2}|\d{1,4}\s?[A-Z]{1,3}\s?(?:97[1-6]|[1-9][1-5]|2[AB])\b)",  # noqa: E501
-    "iban": r"(\b(?:[A-Z]{2}[ \-]?[0-9]{2})(?=(?:[ \-]?[A-Z0-9]){9,30})(?:(?:[ \-]?[A-Z0-9]{3,5}){2,7})(?:[ \-]?[A-Z0-9]{1,3})?\b)",  # noqa: E501
-    "credit_card_number": r"(\b(?:(?:4\d{3})|(?:5[0-5]\d{2})|(?:6\d{3})|(?:1\d{3})|(?:3\d{3}))[- ]?(?:\d{3,4})[- ]?(?:\d{3,4})[- ]?(?:\d{3,5})\b)",  # noqa: E501
-    "website": r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»“”‘’]))",  # noqa: E501
+# categories of the patterns scanned by match_regex
+REGEX_CATEGORIES = {
+    "email": "email",
+    "numero_identifiant": "numeroIdentifiant",
+    "license_plate": "plaqueImmatriculation",
+    "iban": "compteBancaire",
+    "credit_card_number": "compteBancaire",
 }
 
 
@@ -31,7 +31,30 @@ class PostProcessFromText(PostProcess):
     ):
         super().__init__(entities, checklist, metadata)
         self.text = text
-        self._deaccented_text = deaccent(text=text)
+
+    @property
+    def text(self):
+        """
+        This function returns the text of the court decision
+        """
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        # deaccented once per text, with the same offsets, and shared by every method
+        self._deaccented_text = deaccent(text=value)
+        # website matches, scanned the first time they are needed
+        self._websites = None
+
+    @property
+    def websites(self) -> list[re.Match]:
+        """
+        This function returns the website addresses found in the text
+        """
+        if self._websites is None:
+            self._websites = list(get_scanner(("website",)).finditer(self.text))
+        return self._websites
 
     def match_from_category(
         self,
@@ -46,26 +69,25 @@ class PostProcessFromText(PostProcess):
         - category: the name of the entity class
         """
 
-        label_pos = []
-        entity_dict = defaultdict(list)
+        # keywords of each label, in the order of the labels so that a keyword
+        # found in several categories keeps the last one, as before
+        entity_dict = defaultdict(set)
         keywords = instantiate_flashtext(case_sensitive)
         output = PostProcessOutput()
         # Iterate over entities found by statistical models to get them
         for entity in self.get_entities_for_categories(categories=category_list):
-            if len(entity.text) > 1 and entity.text not in entity_dict[entity.label]:
-                entity_dict[entity.label].append(deaccent(entity.text))
+            if len(entity.text) > 1:
+                entity_dict[entity.label].add(deaccent(entity.text))
                 if uppercase and entity.text != entity.text.upper():
-                    entity_dict[entity.label].append(deaccent(entity.text.upper()))
-            label_pos.append(entity.label)
+                    entity_dict[entity.label].add(deaccent(entity.text.upper()))
         keywords.add_keywords_from_dict(entity_dict)
         # Iterate over the text to match entities
         keywords_found = keywords.extract_keywords(self._deaccented_text, span_info=True)
         for category, start_new_entity, end_new_entity in keywords_found:
             if self.check_overlap_entities_from_index(start_new_entity, end_new_entity):
-                new_entity = NamedEntity(
+                new_entity = NamedEntity.fast_construct(
                     text=self.text[start_new_entity:end_new_entity],
                     start=start_new_entity,
-                    end=end_new_entity,
                     label=category,
                     source="postprocess",
                 )
@@ -92,80 +114,31 @@ class PostProcessFromText(PostProcess):
         - SIRET
         - credit card number
         """
-        start_pos = []
-        end_pos = []
-        match_categories = []
-        regex_list = []
-        group_dict = {}
-        category_dict = {}
         output = PostProcessOutput()
 
-        i = 0
-        # Iterate over entities to get start and end indexes
-        for entity in self.entities:
-            start_pos.append(entity.start)
-            end_pos.append(entity.end)
-        # Regex for email
-        if email:
-            like_email = REGEXES["email"]
-            regex_list.append(like_email)
-            group_dict[i] = "email"
-            category_dict["email"] = "email"
-            i += 1
-        # Regex for INSEE number
-        if numero_identifiant:
-            like_numero_identifiant = REGEXES["numero_identifiant"]
-            regex_list.append(like_numero_identifiant)
-            group_dict[i] = "numero_identifiant"
-            category_dict["numero_identifiant"] = "numeroIdentifiant"
-            i += 1
-        # Regex for license plate
-        if license_plate:
-            like_license_plate = REGEXES["license_plate"]
-            regex_list.append(like_license_plate)
-            group_dict[i] = "license_plate"
-            category_dict["license_plate"] = "plaqueImmatriculation"
-            i += 1
-        # Regex for IBAN
-        if iban:
-            like_iban = REGEXES["iban"]
-            regex_list.append(like_iban)
-            group_dict[i] = "iban"
-            category_dict["iban"] = "compteBancaire"
-            i += 1
-
-        # Regex for credit card number
-        if credit_card_number:
-            like_credit_card_number = REGEXES["credit_card_number"]
-            regex_list.append(like_credit_card_number)
-            group_dict[i] = "credit_card_number"
-            category_dict["credit_card_number"] = "compteBancaire"
-            i += 1
-
-        # Add entities to the final list after several checks
-        for match in re.finditer(rf"{'|'.join(regex_list)}", self.text):
-            potential_entity = False
-            group_matching = group_dict[match.groups().index(match.group())]
-            if group_matching == "iban":
+        enabled = {
+            "email": email,
+            "numero_identifiant": numero_identifiant,
+            "license_plate": license_plate,
+            "iban": iban,
+            "credit_card_number": credit_card_number,
+        }
+        # one scan of the text for all the enabled patterns
+        for name, match in scan(self.text, [name for name in REGEX_CATEGORIES if enabled[name]]):
+            if name == "iban":
                 # Use ISO 13616 to validate IBAN number
-                if IBAN(match.group(), allow_invalid=True).is_valid:
-                    match_categories.append(match)
-                    potential_entity = True
-            elif group_matching == "credit_card_number":
+                potential_entity = IBAN(match.group(), allow_invalid=True).is_valid
+            elif name == "credit_card_number":
                 # Use Luhn algorithm to validate credit card number
-                if verify(re.sub("[^0-9]", "", match.group())):
-                    match_categories.append(match)
-                    potential_entity = True
+                potential_entity = verify(re.sub("[^0-9]", "", match.group()))
             else:
-                match_categories.append(match)
                 potential_entity = True
 
             if potential_entity and self.check_overlap_entities_from_index(match.start(), match.end()):
-                new_entity = NamedEntity(
+                new_entity = NamedEntity.fast_construct(
                     text=match.group(),
                     start=match.start(),
-                    end=match.end(),
-                    label=category_dict[group_matching],
+                    label=REGEX_CATEGORIES[name],
                     source="postprocess",
                 )
                 self.insert_entity(new_entity)
@@ -194,9 +167,7 @@ class PostProcessFromText(PostProcess):
                     for entity in self.entities_by_category[CategoryEnum.personneMorale]
                 ]
             )
-        # Regex to find a website
-        regex = REGEXES["website"]
-        for match in re.finditer(regex, self.text):
+        for match in self.websites:
             for name in concerned_entities:
                 if name in match.group() and self.check_overlap_entities_from_index(match.start(), match.end()):
                     website_split_list = re.split(r"\.|//", match.group())
@@ -205,10 +176,9 @@ class PostProcessFromText(PostProcess):
                             sensitive_domain = re.search(re.escape(split), match.group())
                             new_start = match.start() + sensitive_domain.start()
                             new_end = match.start() + sensitive_domain.end()
-                            new_entity = NamedEntity(
+                            new_entity = NamedEntity.fast_construct(
                                 text=split,
                                 start=new_start,
-                                end=new_end,
                                 label="siteWebSensible",
                                 source="postprocess",
                             )
@@ -312,15 +282,14 @@ class PostProcessFromText(PostProcess):
         ):
             party_keywords = instantiate_flashtext(True)
             party_keywords.add_keywords_from_list(list(not_detected_party))
-            party_found = party_keywords.extract_keywords(deaccent(self.text), span_info=True)
+            party_found = party_keywords.extract_keywords(self._deaccented_text, span_info=True)
             start_pos = []
             end_pos = []
             for keyword, start_keyword, end_keyword in party_found:
                 if self.check_overlap_entities_from_index(start_keyword, end_keyword):
-                    new_entity = NamedEntity(
+                    new_entity = NamedEntity.fast_construct(
                         text=self.text[start_keyword:end_keyword],
                         start=start_keyword,
-                        end=end_keyword,
                         label="personnePhysique",
                         source="postprocess",
                     )
@@ -363,10 +332,9 @@ class PostProcessFromText(PostProcess):
 
             for keyword, start_keyword, end_keyword in party_found:
                 if self.check_overlap_entities_from_index(start_keyword, end_keyword):
-                    new_entity = NamedEntity(
+                    new_entity = NamedEntity.fast_construct(
                         text=self.text[start_keyword:end_keyword],
                         start=start_keyword,
-                        end=end_keyword,
                         label="personnePhysique",
                         source="postprocess",
                     )
@@ -471,13 +439,12 @@ class PostProcessFromText(PostProcess):
         for loc in location:
             keyword.add_keyword(f"{juvenile_facility} {loc}")
         # Find entities in the text without accents
-        keyword_found = keyword.extract_keywords(deaccent(self.text), span_info=True)
+        keyword_found = keyword.extract_keywords(self._deaccented_text, span_info=True)
         for new_ent, start_new_ent, end_new_ent in keyword_found:
             if self.check_overlap_entities_from_index(start_new_ent, end_new_ent):
-                new_entity = NamedEntity(
+                new_entity = NamedEntity.fast_construct(
                     text=self.text[start_new_ent:end_new_ent],
                     start=start_new_ent,
-                    end=end_new_ent,
                     label="etablissement",
                     source="postprocess",
                 )
@@ -500,7 +467,7 @@ class PostProcessFromText(PostProcess):
         for title in titles:
             keyword.add_keyword(f"{le_after_sir} {title}")
         # Find entities in the text without accents
-        keyword_found = keyword.extract_keywords(deaccent(self.text), span_info=True)
+        keyword_found = keyword.extract_keywords(self._deaccented_text, span_info=True)
 
         index_list_le = []
         for keyword in keyword_found:
@@ -599,7 +566,7 @@ class PostProcessFromText(PostProcess):
         separator_re = re.compile(s)
 
         # extraction of websites
-        website = re.compile(REGEXES["website"])
+        website = get_scanner(("website",))
         for i, w in enumerate(website.finditer(additional_terms_str)):
             placeholder = f"WEBSITE_PLACEHOLDER_{i}"
             additional_terms_str = additional_terms_str.replace(w.group(), placeholder)
@@ -616,7 +583,7 @@ class PostProcessFromText(PostProcess):
         # text settings
         text = self.text
         if ignore_accents:
-            text = deaccent(text=text)
+            text = self._deaccented_text
         if ignore_case:
             additional_terms = [a.upper() for a in additional_terms]
             text = text.upper()
@@ -625,9 +592,8 @@ class PostProcessFromText(PostProcess):
             for instance in re.finditer(pattern=term, string=text):
                 if instance.group():
                     entities.append(
-                        NamedEntity(
+                        NamedEntity.fast_construct(
                             start=instance.start(),
-                            end=instance.end(),
                             text=self.text[instance.start() : instance.end()],
                             label="annotationSupplementaire",
                             source="postprocess",
@@ -0,0 +1,81 @@
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+# patterns of the regex-driven categories, by name
+REGEXES = {
+    "email": r"(\b[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+\b)",
+    # numero_identifiant: insee|passport
+    "numero_identifiant": r"(\b(?:\d\s?(?:\d{2}\s?){3}(?:\d{3}\s?){2}(?:\d{2}|\d{0}))|(?:[0-9]{2}[A-z]{2}[0-9]{5})\b)",
+    "license_plate": r"(\b[A-Z]{2}-\d{3}-[A-Z]{2}|\d{1,4}\s?[A-Z]{1,3}\s?(?:97[1-6]|[1-9][1-5]|2[AB])\b)",  # noqa: E501
+    "iban": r"(\b(?:[A-Z]{2}[ \-]?[0-9]{2})(?=(?:[ \-]?[A-Z0-9]){9,30})(?:(?:[ \-]?[A-Z0-9]{3,5}){2,7})(?:[ \-]?[A-Z0-9]{1,3})?\b)",  # noqa: E501
+    "credit_card_number": r"(\b(?:(?:4\d{3})|(?:5[0-5]\d{2})|(?:6\d{3})|(?:1\d{3})|(?:3\d{3}))[- ]?(?:\d{3,4})[- ]?(?:\d{3,4})[- ]?(?:\d{3,5})\b)",  # noqa: E501
+    "website": r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»“”‘’]))",  # noqa: E501
+}
+
+# global inline flags, only allowed at the start of a whole expression
+_GLOBAL_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+
+def register_regex(name: str, pattern: str):
+    """Registers the pattern of a regex-driven category
+
+    Args:
+        name (str): name of the pattern, a valid python identifier
+        pattern (str): uncompiled regular expression
+
+    Raises:
+        ValueError: if the name cannot be used as a group name
+    """
+    if not name.isidentifier():
+        raise ValueError(f"{name} cannot be used as a regex group name")
+    REGEXES[name] = pattern
+    get_scanner.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_scanner(names: tuple[str, ...], flags: int = 0) -> re.Pattern:
+    """Returns the compiled alternation of the registered patterns
+
+    Each pattern is wrapped in a group named after it, so that the pattern of a
+    match is given by `match.lastgroup`. Patterns are tried in the given order
+    at each position, as with `"|".join(patterns)`. The compiled scanner is
+    cached per combination of names and flags.
+
+    Args:
+        names (tuple[str, ...]): names of the registered patterns
+        flags (int, optional): flags of re.compile. Defaults to 0.
+
+    Raises:
+        KeyError: if a pattern is not registered
+
+    Returns:
+        re.Pattern: the compiled scanner
+    """
+    alternatives = []
+    for name in names:
+        pattern = REGEXES[name]
+        # (?i)pattern becomes (?i:pattern), a global flag being forbidden inside an alternation
+        global_flags = _GLOBAL_FLAGS.match(pattern)
+        if global_flags:
+            pattern = f"(?{global_flags.group(1)}:{pattern[global_flags.end():]})"
+        alternatives.append(f"(?P<{name}>{pattern})")
+    return re.compile("|".join(alternatives), flags)
+
+
+def scan(text: str, names: Iterable[str], flags: int = 0) -> Iterator[tuple[str, re.Match]]:
+    """Scans the text once for all the given patterns
+
+    Args:
+        text (str): text to scan
+        names (Iterable[str]): names of the registered patterns, by priority
+        flags (int, optional): flags of re.compile. Defaults to 0.
+
+    Yields:
+        tuple[str, re.Match]: name of the pattern and non-overlapping match
+    """
+    names = tuple(names)
+    if not names:
+        return
+    for match in get_scanner(names, flags).finditer(text):
+        yield match.lastgroup, match
@@ -0,0 +1,174 @@
+from typing import Iterable
+
+import numpy as np
+from flair.data import Sentence
+
+# bits of TokenTable.casing
+IS_TITLE = 1
+IS_UPPER = 2
+IS_ALPHA = 4
+IS_CIVILITY = 8
+# tag id of the tokens outside of any span
+OUTSIDE = -1
+
+CIVILITIES = frozenset(["Madame", "Monsieur", "M.", "Mme"])
+
+
+class TokenTable:
+    """Tokens, sentences and spans of a decision stored in flat arrays
+
+    The table is built once from the flair sentences predicted by the NER model
+    and is all the postprocessing on sentences needs: it can be pickled and sent
+    to another process much more cheaply than the flair objects.
+
+    Tokens are numbered across the whole document. The tokens of the sentence `i`
+    are `sentence_bounds[i]:sentence_bounds[i + 1]` and its spans are
+    `span_bounds[i]:span_bounds[i + 1]`, in the order of `Sentence.get_spans`.
+    Tags are stored as ids in `tags`.
+    """
+
+    def __init__(
+        self,
+        token_texts: list[str],
+        token_starts: np.ndarray,
+        whitespace_after: np.ndarray,
+        sentence_bounds: np.ndarray,
+        sentence_starts: np.ndarray,
+        span_bounds: np.ndarray,
+        span_token_starts: np.ndarray,
+        span_token_ends: np.ndarray,
+        span_tag_ids: np.ndarray,
+        tags: list[str],
+    ):
+        self.token_texts = token_texts
+        self.token_starts = token_starts
+        self.token_ends = token_starts + np.fromiter(map(len, token_texts), dtype=np.int32, count=len(token_texts))
+        self.whitespace_after = whitespace_after
+        self.casing = np.fromiter(map(_casing, token_texts), dtype=np.uint8, count=len(token_texts))
+        self.sentence_bounds = sentence_bounds
+        self.sentence_starts = sentence_starts
+        # same as Sentence.end_position, which adds the start of the sentence to the end of its last token
+        last_tokens = np.maximum(sentence_bounds[1:] - 1, 0)
+        self.sentence_ends = np.where(
+            sentence_bounds[1:] > sentence_bounds[:-1],
+            sentence_starts + self.token_ends[last_tokens] + whitespace_after[last_tokens]
+            if len(token_texts)
+            else sentence_starts,
+            sentence_starts,
+        )
+        self.span_bounds = span_bounds
+        self.span_token_starts = span_token_starts
+        self.span_token_ends = span_token_ends
+        self.span_tag_ids = span_tag_ids
+        self.tags = tags
+        self._tag_ids = {tag: tag_id for tag_id, tag in enumerate(tags)}
+        # tag of the span of each token, OUTSIDE if the token is in no span
+        self.token_tag_ids = np.full(len(token_texts), OUTSIDE, dtype=np.int32)
+        for start, end, tag_id in zip(span_token_starts, span_token_ends, span_tag_ids):
+            self.token_tag_ids[start:end] = tag_id
+        self.sentence_strings = [
+            self.text(start, end) for start, end in zip(sentence_bounds[:-1].tolist(), sentence_bounds[1:].tolist())
+        ]
+
+    @classmethod
+    def from_flair_sentences(cls, flair_sentences: Iterable[Sentence], label_type: str = "ner") -> "TokenTable":
+        """Builds the table of flair sentences
+
+        Args:
+            flair_sentences (Iterable[Sentence]): sentences with their predicted spans
+            label_type (str, optional): type of the labels of the spans. Defaults to "ner".
+
+        Returns:
+            TokenTable: the table of the sentences
+        """
+        token_texts, token_starts, whitespace_after = [], [], []
+        sentence_bounds, sentence_starts = [0], []
+        span_bounds, span_token_starts, span_token_ends, span_tags = [0], [], [], []
+        for sentence in flair_sentences:
+            first_token = len(token_texts)
+            for token in sentence:
+                token_texts.append(token.text)
+                token_starts.append(token.start_position)
+                whitespace_after.append(token.whitespace_after)
+            for span in sentence.get_spans(label_type):
+                span_token_starts.append(first_token + span[0].idx - 1)
+                span_token_ends.append(first_token + span[-1].idx)
+                span_tags.append(span.get_label(label_type).value)
+            sentence_bounds.append(len(token_texts))
+            sentence_starts.append(sentence.start_position or 0)
+            span_bounds.append(len(span_tags))
+
+        tags = list(dict.fromkeys(span_tags))
+        tag_ids = {tag: tag_id for tag_id, tag in enumerate(tags)}
+        return cls(
+            token_texts=token_texts,
+            token_starts=np.array(token_starts, dtype=np.int32),
+            whitespace_after=np.array(whitespace_after, dtype=np.int32),
+            sentence_bounds=np.array(sentence_bounds, dtype=np.int64),
+            sentence_starts=np.array(sentence_starts, dtype=np.int64),
+            span_bounds=np.array(span_bounds, dtype=np.int64),
+            span_token_starts=np.array(span_token_starts, dtype=np.int64),
+            span_token_ends=np.array(span_token_ends, dtype=np.int64),
+            span_tag_ids=np.array([tag_ids[tag] for tag in span_tags], dtype=np.int32),
+            tags=tags,
+        )
+
+    def __len__(self) -> int:
+        return len(self.sentence_starts)
+
+    def __getstate__(self) -> dict:
+        # the derived arrays are rebuilt by __init__ when unpickling
+        state = dict(self.__dict__)
+        for derived in ["token_ends", "casing", "sentence_ends", "token_tag_ids", "sentence_strings", "_tag_ids"]:
+            del state[derived]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    def sentence_tokens(self, index_sentence: int) -> tuple[int, int]:
+        """Returns the indexes of the first and after the last tokens of a sentence"""
+        return int(self.sentence_bounds[index_sentence]), int(self.sentence_bounds[index_sentence + 1])
+
+    def sentence_spans(self, index_sentence: int) -> range:
+        """Returns the indexes of the spans of a sentence"""
+        return range(int(self.span_bounds[index_sentence]), int(self.span_bounds[index_sentence + 1]))
+
+    def text(self, start_token: int, end_token: int) -> str:
+        """Returns the text of the tokens start_token:end_token, as Span.text"""
+        return "".join(
+            text + " " * whitespace
+            for text, whitespace in zip(
+                self.token_texts[start_token:end_token],
+                self.whitespace_after[start_token:end_token].tolist(),
+            )
+        ).strip()
+
+    def span_tag(self, index_span: int) -> str:
+        """Returns the tag of a span"""
+        return self.tags[self.span_tag_ids[index_span]]
+
+    def set_span_tag(self, index_span: int, tag: str):
+        """Changes the tag of a span and of its tokens"""
+        if tag not in self._tag_ids:
+            self._tag_ids[tag] = len(self.tags)
+            self.tags.append(tag)
+        tag_id = self._tag_ids[tag]
+        self.span_tag_ids[index_span] = tag_id
+        self.token_tag_ids[self.span_token_starts[index_span] : self.span_token_ends[index_span]] = tag_id
+
+    def tag_mask(self, substring: str) -> np.ndarray:
+        """Returns a mask of the tokens whose span tag contains substring"""
+        matching_tags = np.array([substring in tag for tag in self.tags] + [False], dtype=bool)
+        # OUTSIDE is -1, i.e. the last item of matching_tags
+        return matching_tags[self.token_tag_ids]
+
+
+def _casing(text: str) -> int:
+    """Returns the casing flags of a token"""
+    return (
+        (IS_TITLE if text.istitle() else 0)
+        | (IS_UPPER if text.isupper() else 0)
+        | (IS_ALPHA if text.isalpha() else 0)
+        | (IS_CIVILITY if text in CIVILITIES else 0)
+    )
@@ -1,7 +1,16 @@
+import hashlib
 import logging
+import multiprocessing
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
 
 import flair
-from flair.data import Sentence
+import torch
+from flair.data import Label, Sentence, Token
 from flair.models import SequenceTagger
 
 from juritools.type import NamedEntity
@@ -10,65 +19,727 @@ from juritools.type import NamedEntity
 logging.getLogger("flair").setLevel(logging.ERROR)
 
 
+# NER model of the inference worker processes, see ParallelJuriTagger
+_worker_model: Optional[SequenceTagger] = None
+
+
 # Load NER model
 def load_ner_model(path: str) -> flair.models.sequence_tagger_model.SequenceTagger:
     return SequenceTagger.load(path)
 
 
+def token_budget_batches(flair_sentences: list[Sentence], max_tokens: int) -> list[list[Sentence]]:
+    """
+    Inputs:
+    - flair_sentences: sentences to predict
+    - max_tokens: maximum number of tokens of a mini-batch, padding included
+
+    Returns the sentences grouped in mini-batches of sentences of similar lengths,
+    from the longest to the shortest. A mini-batch holds as many sentences as
+    the budget allows once they are padded to the longest one, so short sentences
+    share large mini-batches and a long paragraph gets a small one. A sentence
+    longer than the budget gets a mini-batch of its own.
+    """
+    batches = []
+    batch = []
+    for sentence in sorted(flair_sentences, key=len, reverse=True):
+        # the first sentence of a batch is the longest one
+        if batch and (len(batch) + 1) * len(batch[0]) > max_tokens:
+            batches.append(batch)
+            batch = []
+        batch.append(sentence)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def predict_sentences(
+    model: SequenceTagger,
+    flair_sentences: list[Sentence],
+    mini_batch_size: int = 32,
+    all_tags: bool = True,
+    verbose: bool = True,
+    max_tokens_per_batch: Optional[int] = None,
+    cache: Optional["PredictionCache"] = None,
+    lean: bool = False,
+):
+    """
+    Inputs:
+    - model: the SequenceTagger
+    - flair_sentences: sentences to predict, the labels are set in place
+    - mini_batch_size: number of sentences per minibatch
+    - all_tags: get probability distribution across categories for each token
+    - verbose: if True verbose is applied to the model
+    - max_tokens_per_batch: if given, mini-batches are built with token_budget_batches
+      and mini_batch_size is ignored
+    - cache: if given, the predictions of the sentences found in the cache are reused
+      and the model only runs on the other ones
+    - lean: if True, the embeddings of the sentences are released after the predictions
+    """
+    if lean:
+        try:
+            predict_sentences(
+                model,
+                flair_sentences,
+                mini_batch_size=mini_batch_size,
+                all_tags=all_tags,
+                verbose=verbose,
+                max_tokens_per_batch=max_tokens_per_batch,
+                cache=cache,
+            )
+        finally:
+            release_embeddings(flair_sentences)
+        return
+
+    if cache is not None:
+        keys = [cache.key(sentence, all_tags) for sentence in flair_sentences]
+        to_predict = []
+        for sentence, key in zip(flair_sentences, keys):
+            predictions = cache.get(key)
+            if predictions is None:
+                to_predict.append((sentence, key))
+            else:
+                set_sentence_predictions(sentence, predictions)
+        predict_sentences(
+            model,
+            [sentence for sentence, _ in to_predict],
+            mini_batch_size=mini_batch_size,
+            all_tags=all_tags,
+            verbose=verbose,
+            max_tokens_per_batch=max_tokens_per_batch,
+        )
+        for sentence, key in to_predict:
+            cache.put(key, get_sentence_predictions(sentence))
+        return
+
+    if not flair_sentences:
+        return
+    if max_tokens_per_batch is None:
+        model.predict(
+            flair_sentences,
+            mini_batch_size=mini_batch_size,
+            return_probabilities_for_all_classes=all_tags,
+            verbose=verbose,
+        )
+        return
+    for batch in token_budget_batches(flair_sentences, max_tokens_per_batch):
+        model.predict(
+            batch,
+            mini_batch_size=len(batch),
+            return_probabilities_for_all_classes=all_tags,
+            verbose=verbose,
+        )
+
+
+def release_embeddings(flair_sentences: list[Sentence]):
+    """
+    Deletes the embeddings kept on the sentences and their tokens
+    """
+    for sentence in flair_sentences:
+        # also clears the embeddings of the tokens
+        sentence.clear_embeddings()
+
+
+def get_sentence_predictions(sentence: Sentence) -> tuple[list[tuple], list[list[tuple]]]:
+    """
+    Returns the predictions of a sentence as picklable tuples:
+    - its "ner" spans as (first_token_index, last_token_index + 1, tag, score)
+    - the probability distribution of each token as (value, score) tuples
+    """
+    return (
+        [(span[0].idx - 1, span[-1].idx, span.tag, span.score) for span in sentence.get_spans("ner")],
+        [[(label.value, label.score) for label in token.get_tags_proba_dist("ner")] for token in sentence],
+    )
+
+
+def set_sentence_predictions(sentence: Sentence, predictions: tuple[list[tuple], list[list[tuple]]]):
+    """
+    Sets on a sentence the predictions returned by get_sentence_predictions
+    """
+    spans, tags_proba_dist = predictions
+    for first_token, last_token, tag, score in spans:
+        sentence[first_token:last_token].add_label("ner", tag, score)
+    for token, token_tags in zip(sentence, tags_proba_dist):
+        if token_tags:
+            token.add_tags_proba_dist("ner", [Label(token, value, score) for value, score in token_tags])
+
+
+def uses_context(model: SequenceTagger) -> bool:
+    """
+    Returns True if the embeddings of the model read the neighbouring sentences,
+    e.g. flair TransformerWordEmbeddings with use_context
+    """
+    embeddings = [model.embeddings]
+    while embeddings:
+        embedding = embeddings.pop()
+        if getattr(embedding, "context_length", 0) > 0:
+            return True
+        # StackedEmbeddings
+        embeddings.extend(getattr(embedding, "embeddings", None) or [])
+    return False
+
+
+def model_fingerprint(model: SequenceTagger) -> str:
+    """
+    Returns a checksum of the weights and of the tags of a SequenceTagger
+    """
+    checksum = hashlib.sha256(model.label_type.encode())
+    checksum.update("\n".join(model.label_dictionary.get_items()).encode())
+    for name, tensor in model.state_dict().items():
+        checksum.update(f"{name}:{tuple(tensor.shape)}:{tensor.dtype}".encode())
+        checksum.update(tensor.detach().cpu().contiguous().reshape(-1).view(torch.uint8).numpy().tobytes())
+    return checksum.hexdigest()
+
+
+class PredictionCache:
+    """LRU cache of the predictions of the NER model, by sentence
+
+    Decisions share a lot of sentences verbatim (court formulas, "PAR CES MOTIFS",
+    citations...). Unless the embeddings of the model read the neighbouring
+    sentences, the predictions of a sentence only depend on its tokens, so they
+    are stored under a hash of the tokens and of the model fingerprint: a cache
+    can be shared by several models, or saved and reloaded with another version
+    of the model, without ever returning stale predictions.
+    The cache is safe to use from several threads.
+    """
+
+    def __init__(self, model: SequenceTagger, maxsize: Optional[int] = 100_000):
+        """
+        Inputs:
+        - model: the SequenceTagger whose predictions are cached
+        - maxsize: maximum number of sentences kept, None for no limit
+        Raises a ValueError if the embeddings of the model use the context of the
+        sentences (flair use_context): their predictions depend on the neighbouring
+        sentences and cannot be cached by sentence
+        """
+        if uses_context(model):
+            raise ValueError("The predictions of a model whose embeddings use the context cannot be cached")
+        self.fingerprint = model_fingerprint(model)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._predictions: OrderedDict[bytes, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._predictions)
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Returns the share of the sentences found in the cache
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def key(self, sentence: Sentence, all_tags: bool) -> bytes:
+        """
+        Returns the key of a sentence: a hash of its tokens, of all_tags and of the model
+        """
+        tokens = tuple((token.text, token.whitespace_after) for token in sentence)
+        return hashlib.blake2b(repr((self.fingerprint, all_tags, tokens)).encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[tuple]:
+        """
+        Returns the predictions stored under the key, or None
+        """
+        with self._lock:
+            predictions = self._predictions.get(key)
+            if predictions is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._predictions.move_to_end(key)
+            return predictions
+
+    def put(self, key: bytes, predictions: tuple):
+        """
+        Stores the predictions of a sentence, dropping the least recently used ones if full
+        """
+        with self._lock:
+            self._predictions[key] = predictions
+            self._predictions.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._predictions) > self.maxsize:
+                    self._predictions.popitem(last=False)
+
+    def clear(self):
+        """
+        Empties the cache and resets the statistics
+        """
+        with self._lock:
+            self._predictions.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def save(self, path: str):
+        """
+        Writes the cached predictions to a file
+        """
+        with self._lock:
+            predictions = dict(self._predictions)
+        with open(path, "wb") as file:
+            pickle.dump(predictions, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path: str):
+        """
+        Adds the predictions saved with save. As the keys include the model fingerprint,
+        predictions saved with another model are never returned.
+        """
+        with open(path, "rb") as file:
+            predictions = pickle.load(file)
+        for key, value in predictions.items():
+            self.put(key, value)
+
+
 # Class JuriTagger to get statistical predictions
 class JuriTagger:
-    def __init__(self, tokenizer, model: SequenceTagger):
+    def __init__(self, tokenizer, model: SequenceTagger, cache: Optional[PredictionCache] = None):
         self.tokenizer = tokenizer
         self.model = model
+        self.cache = cache
 
     def predict(
         self,
         text: str,
         mini_batch_size: int = 32,
-        all_tags: bool = True,
+        all_tags: Optional[bool] = None,
         verbose: bool = True,
+        max_tokens_per_batch: Optional[int] = None,
+        lean: bool = False,
     ) -> list[Sentence]:
         """
         Inputs:
         - text: decision court on which the SequenceClassifier will make some predictions
         - mini_batch_size: size of the minibatch, usually bigger is more rapid but consume more memory
-        - all_tags: get probability distribution across categories for each token
+        - all_tags: get probability distribution across categories for each token,
+          by default only outside of the lean mode
         - verbose: if True verbose is applied to the model
+        - max_tokens_per_batch: if given, mini-batches are capped by their number of padded
+          tokens instead of mini_batch_size, see token_budget_batches
+        - lean: memory-lean mode, the sentences only keep their tokens and "ner" spans:
+          the embeddings are released and the probability distributions are not computed
+          unless all_tags is True
 
         Returns a generator containing flair sentences with NER predicted tags
         """
 
-        self.text = text
-        # Transform text to sentences
-        self.flair_sentences = self.tokenizer.get_tokenized_sentences(self.text)
+        self.tokenize(text)
 
         # Make predictions
-        self.model.predict(
+        predict_sentences(
+            self.model,
             self.flair_sentences,
             mini_batch_size=mini_batch_size,
-            return_probabilities_for_all_classes=all_tags,
+            all_tags=not lean if all_tags is None else all_tags,
             verbose=verbose,
+            max_tokens_per_batch=max_tokens_per_batch,
+            cache=self.cache,
+            lean=lean,
         )
 
         return self.flair_sentences
 
+    def tokenize(self, text: str) -> list[Sentence]:
+        """
+        Inputs:
+        - text: decision court to split into flair sentences
+
+        Returns the flair sentences of the text, without any prediction
+        """
+        self.text = text
+        self.flair_sentences = self.tokenizer.get_tokenized_sentences(self.text)
+
+        return self.flair_sentences
+
+    @classmethod
+    def predict_batch(
+        cls,
+        tokenizer,
+        model: SequenceTagger,
+        texts: list[str],
+        mini_batch_size: int = 32,
+        all_tags: Optional[bool] = None,
+        verbose: bool = True,
+        max_tokens_per_batch: Optional[int] = None,
+        cache: Optional[PredictionCache] = None,
+        lean: bool = False,
+    ) -> list["JuriTagger"]:
+        """
+        Inputs:
+        - tokenizer: tokenizer used to create the flair sentences
+        - model: SequenceTagger shared by every text
+        - texts: court decisions on which the SequenceTagger will make some predictions
+        - mini_batch_size: size of the minibatch, sentences of every text are pooled
+        - all_tags: get probability distribution across categories for each token,
+          by default only outside of the lean mode
+        - verbose: if True verbose is applied to the model
+        - max_tokens_per_batch: if given, mini-batches are capped by their number of padded
+          tokens instead of mini_batch_size, see token_budget_batches
+        - cache: if given, predictions cache shared by every text
+        - lean: memory-lean mode, see JuriTagger.predict
+
+        Returns one JuriTagger per text, in the same order, holding its own predicted sentences.
+        Sentences of all the texts are sorted by length and share the same mini-batches,
+        so that short decisions do not pay a full model call each.
+        """
+        juritaggers = [cls(tokenizer, model, cache) for _ in texts]
+        pooled_sentences = []
+        for juritag, text in zip(juritaggers, texts):
+            pooled_sentences.extend(juritag.tokenize(text))
+
+        # Labels are set in place on each sentence, so the predictions
+        # are split back per decision without any bookkeeping
+        pooled_sentences.sort(key=len, reverse=True)
+        if pooled_sentences:
+            predict_sentences(
+                model,
+                pooled_sentences,
+                mini_batch_size=mini_batch_size,
+                all_tags=not lean if all_tags is None else all_tags,
+                verbose=verbose,
+                max_tokens_per_batch=max_tokens_per_batch,
+                cache=cache,
+                lean=lean,
+            )
+
+        return juritaggers
+
+    def predict_stream(
+        self,
+        text: str,
+        window_size: int = 100_000,
+        mini_batch_size: int = 32,
+        all_tags: Optional[bool] = None,
+        verbose: bool = False,
+        max_tokens_per_batch: Optional[int] = None,
+        lean: bool = False,
+    ) -> Iterator[NamedEntity]:
+        """
+        Inputs:
+        - text: decision court on which the SequenceClassifier will make some predictions
+        - window_size: number of characters tokenized and predicted at once
+        - mini_batch_size: size of the minibatch, usually bigger is more rapid but consume more memory
+        - all_tags: get probability distribution across categories for each token,
+          by default only outside of the lean mode
+        - verbose: if True verbose is applied to the model
+        - max_tokens_per_batch: if given, mini-batches are capped by their number of padded
+          tokens instead of mini_batch_size, see token_budget_batches
+        - lean: memory-lean mode, see predict
+
+        Yields the entities predicted in the text, in order, with their offsets in the whole text.
+        The text is processed in windows ending at a line break, the flair sentences of a
+        window being dropped before the next one is tokenized, so that the memory used
+        depends on the window size instead of the length of the text.
+        flair_sentences is not filled.
+        """
+        self.text = text
+        self.flair_sentences = []
+        for window_start, window_end in _text_windows(text, window_size):
+            flair_sentences = self.tokenizer.get_tokenized_sentences(text[window_start:window_end])
+            predict_sentences(
+                self.model,
+                flair_sentences,
+                mini_batch_size=mini_batch_size,
+                all_tags=not lean if all_tags is None else all_tags,
+                verbose=verbose,
+                max_tokens_per_batch=max_tokens_per_batch,
+                cache=self.cache,
+                lean=lean,
+            )
+            yield from _entities_from_sentences(text, flair_sentences, window_start)
+
     def get_entity_json_from_flair_sentences(self) -> list[NamedEntity]:
         """
         Returns a list containing dictionaries formatted to be the input of
         the class PostProcess to enhance the predictions and check irregularities.
         Built from flair sentence and span objects.
         """
-        entity_spans = []
-        for sent in self.flair_sentences:
-            entity_spans.extend(list(sent.get_spans("ner")))
-        return [
-            NamedEntity(
-                text=self.text[entity.start_position : entity.end_position],
-                start=entity.start_position,
-                end=entity.end_position,
+        return list(_entities_from_sentences(self.text, self.flair_sentences))
+
+
+def _entities_from_sentences(text: str, flair_sentences: list[Sentence], offset: int = 0) -> Iterator[NamedEntity]:
+    """Yields the entities of the "ner" spans of the sentences, whose offsets start at offset in text"""
+    for sent in flair_sentences:
+        for entity in sent.get_spans("ner"):
+            yield NamedEntity.fast_construct(
+                text=text[offset + entity.start_position : offset + entity.end_position],
+                start=offset + entity.start_position,
                 label=entity.tag,
                 source="NER model",
                 score=entity.score,
             )
-            for entity in entity_spans
+
+
+def _text_windows(text: str, window_size: int) -> Iterator[tuple[int, int]]:
+    """Yields (start, end) windows of at most window_size characters ending after a line break
+
+    A line longer than window_size makes a window of its own.
+    """
+    start = 0
+    while start < len(text):
+        end = start + window_size
+        if end >= len(text):
+            end = len(text)
+        else:
+            line_break = text.rfind("\n", start, end)
+            if line_break == -1:
+                line_break = text.find("\n", end)
+            end = len(text) if line_break == -1 else line_break + 1
+        yield start, end
+        start = end
+
+
+class ParallelJuriTagger(JuriTagger):
+    """JuriTagger spreading the sentences of a decision over several processes
+
+    Each worker process loads its own replica of the model once, when it starts,
+    and limits torch to `num_threads` threads so that the workers do not
+    oversubscribe the cores. The pool is meant to be created once and reused
+    for every decision; call `close` (or use it as a context manager) to stop it.
+    predict and predict_stream spread the sentences over the workers, predict_batch
+    is not supported. The predictions are not cached: PredictionCache is not
+    supported here.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        model_path: str,
+        n_workers: int = 2,
+        num_threads: Optional[int] = None,
+    ):
+        """
+        Inputs:
+        - tokenizer: tokenizer used to create the flair sentences
+        - model_path: path of the NER model, loaded by each worker with load_ner_model
+        - n_workers: number of worker processes
+        - num_threads: torch threads per worker, defaults to the number of CPUs divided by n_workers
+        """
+        super().__init__(tokenizer, model=None)
+        self.n_workers = n_workers
+        if num_threads is None:
+            num_threads = max(1, (os.cpu_count() or 1) // n_workers)
+        # spawn: torch is not fork-safe once its thread pools are started
+        self.executor = ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_ner_worker,
+            initargs=(model_path, num_threads),
+        )
+
+    def predict(
+        self,
+        text: str,
+        mini_batch_size: int = 32,
+        all_tags: Optional[bool] = None,
+        verbose: bool = False,
+        max_tokens_per_batch: Optional[int] = None,
+        lean: bool = False,
+    ) -> list[Sentence]:
+        """
+        Inputs:
+        - text: decision court on which the SequenceClassifier will make some predictions
+        - mini_batch_size: size of the minibatch in each worker
+        - all_tags: get probability distribution across categories for each token,
+          by default only outside of the lean mode
+        - verbose: if True verbose is applied to the models of the workers
+        - max_tokens_per_batch: if given, mini-batches are capped by their number of padded
+          tokens instead of mini_batch_size, see token_budget_batches
+        - lean: memory-lean mode, see JuriTagger.predict. The sentences sent back by the
+          workers never hold embeddings.
+
+        Returns the flair sentences with NER predicted tags, as JuriTagger.predict.
+        The sentences are split into one chunk per worker, with about the same number
+        of tokens, and the predictions are set back on the sentences in order.
+        """
+        self.tokenize(text)
+        self._predict_in_workers(
+            self.flair_sentences,
+            mini_batch_size=mini_batch_size,
+            all_tags=not lean if all_tags is None else all_tags,
+            verbose=verbose,
+            max_tokens_per_batch=max_tokens_per_batch,
+        )
+
+        return self.flair_sentences
+
+    def predict_stream(
+        self,
+        text: str,
+        window_size: int = 100_000,
+        mini_batch_size: int = 32,
+        all_tags: Optional[bool] = None,
+        verbose: bool = False,
+        max_tokens_per_batch: Optional[int] = None,
+        lean: bool = False,
+    ) -> Iterator[NamedEntity]:
+        """
+        Inputs:
+        - text: decision court on which the SequenceClassifier will make some predictions
+        - window_size: number of characters tokenized and predicted at once
+        - mini_batch_size: size of the minibatch in each worker
+        - all_tags: get probability distribution across categories for each token,
+          by default only outside of the lean mode
+        - verbose: if True verbose is applied to the models of the workers
+        - max_tokens_per_batch: if given, mini-batches are capped by their number of padded
+          tokens instead of mini_batch_size, see token_budget_batches
+        - lean: memory-lean mode, see predict
+
+        Yields the entities predicted in the text, as JuriTagger.predict_stream.
+        The sentences of each window are spread over the workers as in predict.
+        """
+        self.text = text
+        self.flair_sentences = []
+        for window_start, window_end in _text_windows(text, window_size):
+            flair_sentences = self.tokenizer.get_tokenized_sentences(text[window_start:window_end])
+            self._predict_in_workers(
+                flair_sentences,
+                mini_batch_size=mini_batch_size,
+                all_tags=not lean if all_tags is None else all_tags,
+                verbose=verbose,
+                max_tokens_per_batch=max_tokens_per_batch,
+            )
+            yield from _entities_from_sentences(text, flair_sentences, window_start)
+
+    @classmethod
+    def predict_batch(cls, *args, **kwargs):
+        """
+        Not supported: the worker pool belongs to a ParallelJuriTagger instance, which
+        this classmethod cannot reach. Call predict on each decision, its sentences are
+        already spread over the workers, or JuriTagger.predict_batch with a loaded model.
+        """
+        raise NotImplementedError(
+            "ParallelJuriTagger.predict_batch is not supported, call predict on each text "
+            "or JuriTagger.predict_batch with a loaded model"
+        )
+
+    def _predict_in_workers(
+        self,
+        flair_sentences: list[Sentence],
+        mini_batch_size: int,
+        all_tags: bool,
+        verbose: bool,
+        max_tokens_per_batch: Optional[int],
+    ):
+        """Predicts the sentences in the worker processes and sets the predictions on them in place"""
+        chunks = _split_sentences(flair_sentences, self.n_workers)
+        payloads = [
+            (pack_flair_sentences(chunk), mini_batch_size, all_tags, verbose, max_tokens_per_batch) for chunk in chunks
         ]
+        for chunk, predictions in zip(chunks, self.executor.map(_predict_worker, payloads)):
+            for sentence, sentence_predictions in zip(chunk, predictions):
+                set_sentence_predictions(sentence, sentence_predictions)
+
+    def close(self):
+        """Stops the worker processes"""
+        self.executor.shutdown()
+
+    def __enter__(self) -> "ParallelJuriTagger":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _split_sentences(flair_sentences: list[Sentence], n_chunks: int) -> list[list[Sentence]]:
+    """Splits the sentences into at most n_chunks consecutive chunks of about the same number of tokens"""
+    total = sum(len(sentence) for sentence in flair_sentences)
+    chunks = []
+    chunk = []
+    chunk_tokens = 0
+    for sentence in flair_sentences:
+        chunk.append(sentence)
+        chunk_tokens += len(sentence)
+        if chunk_tokens * n_chunks >= total * (len(chunks) + 1) and len(chunks) < n_chunks - 1:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _init_ner_worker(model_path: str, num_threads: int):
+    """Loads the NER model in an inference worker process"""
+    global _worker_model
+    torch.set_num_threads(num_threads)
+    _worker_model = load_ner_model(model_path)
+
+
+def _predict_worker(payload: tuple) -> list[tuple]:
+    """Predicts the sentences sent by ParallelJuriTagger.predict in a worker process
+
+    Returns the predictions of each sentence, see get_sentence_predictions
+    """
+    packed_sentences, mini_batch_size, all_tags, verbose, max_tokens_per_batch = payload
+    flair_sentences = unpack_flair_sentences(packed_sentences)
+    predict_sentences(
+        _worker_model,
+        flair_sentences,
+        mini_batch_size=mini_batch_size,
+        all_tags=all_tags,
+        verbose=verbose,
+        max_tokens_per_batch=max_tokens_per_batch,
+    )
+    return [get_sentence_predictions(sentence) for sentence in flair_sentences]
+
+
+def pack_flair_sentences(flair_sentences: list[Sentence]) -> list[tuple]:
+    """
+    Returns a compact and picklable representation of predicted flair sentences.
+    Each sentence becomes a tuple (start_position, tokens, spans) where:
+    - tokens is a list of (text, start_position, whitespace_after)
+    - spans is a list of (first_token_index, last_token_index + 1, tag, score) for the "ner" layer
+
+    Embeddings and probability distributions are not kept.
+    """
+    return [
+        (
+            sentence.start_position,
+            [(token.text, token.start_position, token.whitespace_after) for token in sentence],
+            [(span[0].idx - 1, span[-1].idx, span.tag, span.score) for span in sentence.get_spans("ner")],
+        )
+        for sentence in flair_sentences
+    ]
+
+
+def unpack_flair_sentences(packed_sentences: list[tuple]) -> list[Sentence]:
+    """
+    Rebuilds flair sentences, with their "ner" spans, from the output of pack_flair_sentences
+    """
+    flair_sentences = []
+    for start_position, tokens, spans in packed_sentences:
+        if not tokens:
+            flair_sentences.append(Sentence("", start_position=start_position))
+            continue
+        sentence = Sentence(
+            [
+                Token(text, start_position=token_start, whitespace_after=whitespace_after)
+                for text, token_start, whitespace_after in tokens
+            ],
+            use_tokenizer=False,
+            start_position=start_position,
+        )
+        for first_token, last_token, tag, score in spans:
+            sentence[first_token:last_token].set_label("ner", tag, score)
+        flair_sentences.append(sentence)
+
+    return flair_sentences
+
+
+def pack_entities(entities: list[NamedEntity]) -> list[tuple]:
+    """
+    Returns a compact and picklable representation of named entities
+    as (text, start, label, source, score) tuples
+    """
+    return [(e.text, e.start, e.label.value, e.source.value, e.score) for e in entities]
+
+
+def unpack_entities(packed_entities: list[tuple]) -> list[NamedEntity]:
+    """
+    Rebuilds named entities from the output of pack_entities
+    """
+    return [
+        NamedEntity.fast_construct(text=text, start=start, label=label, source=source, score=score)
+        for text, start, label, source, score in packed_entities
+    ]
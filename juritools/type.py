@@ -1,9 +1,11 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from enum import Enum
 from aenum import MultiValueEnum
 
 
 from pydantic import BaseModel, computed_field, field_validator
-from typing import Any, Optional, Union
+from typing import Any, Iterator, Optional, Union
 from juritools.utils import deaccent
 
 
@@ -73,7 +75,70 @@ class NamedEntity(BaseModel):
         return True
 
     def __hash__(self) -> int:
-        return hash(f"{self.start}->{self.end}: {self.text} [{self.label} ({self.source}:{self.score})]")
+        return hash((self.start, self.end, self.text, self.label, self.source, self.score))
+
+    def __setattr__(self, name: str, value: Any):
+        # same as BaseModel.__setattr__ for the fields, without its generic checks: entities are
+        # modified in place all over the postprocessing. The model does not set validate_assignment,
+        # so BaseModel.__setattr__ does not validate the values either; enabling it requires
+        # removing this shortcut (see test_named_entity_assignment)
+        if name in _NAMED_ENTITY_FIELDS:
+            self.__dict__[name] = value
+            self.__pydantic_fields_set__.add(name)
+        else:
+            super().__setattr__(name, value)
+
+    @classmethod
+    def fast_construct(
+        cls,
+        text: str,
+        start: int,
+        label: Union[CategoryEnum, str],
+        source: Union[SourceEnum, str],
+        score: Optional[float] = None,
+    ) -> "NamedEntity":
+        """Creates an entity without running the pydantic validation
+
+        Meant for the entities created by juritools itself, whose fields already
+        have the right types: only the label and the source are converted to
+        their enums and the text is checked not to be empty, like the validation
+        would do. It is several times faster than the constructor.
+
+        Args:
+            text (str): text of the entity
+            start (int): start index of the entity in the text
+            label (Union[CategoryEnum, str]): category of the entity
+            source (Union[SourceEnum, str]): source of the entity
+            score (float, optional): score of the entity. Defaults to 1.0.
+
+        Raises:
+            ValueError: if the text is empty
+
+        Returns:
+            NamedEntity: the entity, equal to NamedEntity(text=text, start=start...)
+        """
+        if text == "":
+            raise ValueError("text field is empty, a named entity cannot be an empty string")
+        entity = cls.__new__(cls)
+        fields = {
+            "text": text,
+            "start": start,
+            "label": label if isinstance(label, CategoryEnum) else CategoryEnum(label),
+            "source": source if isinstance(source, SourceEnum) else SourceEnum(source),
+            "score": 1.0 if score is None else score,
+        }
+        object.__setattr__(entity, "__dict__", fields)
+        object.__setattr__(
+            entity,
+            "__pydantic_fields_set__",
+            {"text", "start", "label", "source"} if score is None else {"text", "start", "label", "source", "score"},
+        )
+        object.__setattr__(entity, "__pydantic_extra__", None)
+        object.__setattr__(entity, "__pydantic_private__", None)
+        return entity
+
+
+_NAMED_ENTITY_FIELDS = frozenset(NamedEntity.model_fields)
 
 
 class CheckTypeEnum(Enum):
@@ -159,6 +224,48 @@ class Check(BaseModel):
         )
 
 
+class ReplacementEnum(Enum):
+    letters = "letters"
+    ellipsis = "[...]"
+    label = "label"
+
+
+class OutputTrackingEnum(Enum):
+    copy = "copy"
+    reference = "reference"
+    disabled = "disabled"
+
+
+_output_tracking: ContextVar[OutputTrackingEnum] = ContextVar("output_tracking", default=OutputTrackingEnum.copy)
+
+
+def get_output_tracking() -> OutputTrackingEnum:
+    """Returns how the PostProcessOutput record the changes in the current context"""
+    return _output_tracking.get()
+
+
+@contextmanager
+def output_tracking(mode: Union[OutputTrackingEnum, str]) -> Iterator[None]:
+    """Sets how the PostProcessOutput record the changes made by the postprocessing
+
+    - copy (default): a snapshot of each entity and check is recorded
+    - reference: the entities and checks themselves are recorded, they reflect
+      the later modifications
+    - disabled: nothing is recorded, the outputs stay empty
+
+    The mode is stored in a context variable, so it applies to the current
+    thread or asyncio task only. Can also be used as a decorator.
+
+    Args:
+        mode (Union[OutputTrackingEnum, str]): tracking mode
+    """
+    token = _output_tracking.set(OutputTrackingEnum(mode))
+    try:
+        yield
+    finally:
+        _output_tracking.reset(token)
+
+
 class PostProcessOutput(BaseModel):
     added_entities: list[NamedEntity] = []
     deleted_entities: list[NamedEntity] = []
@@ -179,54 +286,70 @@ class PostProcessOutput(BaseModel):
         *args,
         **kwargs,
     ):
+        if _output_tracking.get() is OutputTrackingEnum.disabled:
+            # nothing will be recorded: skip the validation of the empty default lists
+            object.__setattr__(self, "__dict__", {name: [] for name in self.model_fields})
+            object.__setattr__(self, "__pydantic_fields_set__", set())
+            object.__setattr__(self, "__pydantic_extra__", None)
+            object.__setattr__(self, "__pydantic_private__", None)
+            return
+
         BaseModel.__init__(self, *args, **kwargs)
 
         for e in added_entities:
             if not isinstance(e, NamedEntity):
                 raise ValueError(f"added_entities should be a list of NamedEntity not {type(e)}")
-            self.added_entities.append(e.model_copy())
+            self.add_added_entity(e)
 
         for e in modified_entities:
             if not isinstance(e, NamedEntity):
                 raise ValueError(f"modified_entities should be a list of NamedEntity not {type(e)}")
-            self.modified_entities.append(e.model_copy())
+            self.add_modified_entity(e)
         for e in deleted_entities:
             if not isinstance(e, NamedEntity):
                 raise ValueError(f"deleted_entities should be a list of NamedEntity not {type(e)}")
-            self.deleted_entities.append(e.model_copy())
+            self.add_deleted_entity(e)
 
         for c in added_checklist:
             if not isinstance(c, Check):
                 raise ValueError(f"added_checklist should be a list of Check not {type(c)}")
-            self.add_added_checklist(c.model_copy())
+            self.add_added_checklist(c)
 
         for c in modified_checklist:
             if not isinstance(c, Check):
                 raise ValueError(f"modified_checklist should be a list of Check not {type(c)}")
-            self.modified_checklist.append(c.model_copy())
+            self.add_modified_checklist(c)
 
         for c in deleted_checklist:
             if not isinstance(c, Check):
                 raise ValueError(f"deleted_checklist should be a list of Check not {type(c)}")
-            self.deleted_checklist.append(c.model_copy())
+            self.add_deleted_checklist(c)
+
+    @staticmethod
+    def _record(records: list, item: Union[NamedEntity, Check]):
+        mode = _output_tracking.get()
+        if mode is OutputTrackingEnum.copy:
+            records.append(item.model_copy())
+        elif mode is OutputTrackingEnum.reference:
+            records.append(item)
 
     def add_added_entity(self, entity: NamedEntity):
-        self.added_entities.append(entity.model_copy())
+        self._record(self.added_entities, entity)
 
     def add_modified_entity(self, entity: NamedEntity):
-        self.modified_entities.append(entity.model_copy())
+        self._record(self.modified_entities, entity)
 
     def add_deleted_entity(self, entity: NamedEntity):
-        self.deleted_entities.append(entity.model_copy())
+        self._record(self.deleted_entities, entity)
 
     def add_added_checklist(self, checklist: Check):
-        self.added_checklist.append(checklist.model_copy())
+        self._record(self.added_checklist, checklist)
 
     def add_modified_checklist(self, checklist: Check):
-        self.modified_checklist.append(checklist.model_copy())
+        self._record(self.modified_checklist, checklist)
 
     def add_deleted_checklist(self, checklist: Check):
-        self.deleted_checklist.append(checklist.model_copy())
+        self._record(self.deleted_checklist, checklist)
 
     def __eq__(self, other):
         return (
@@ -239,13 +362,13 @@ class PostProcessOutput(BaseModel):
         )
 
     def merge_output(self, other):
-        self.deleted_entities = self.deleted_entities + other.deleted_entities
-        self.deleted_checklist = self.deleted_checklist + other.deleted_checklist
+        self.deleted_entities.extend(other.deleted_entities)
+        self.deleted_checklist.extend(other.deleted_checklist)
         # TODO: consulter Amaury pour voir si on a intérêt à être plus subtils pour les champs suivants
-        self.added_entities = self.added_entities + other.added_entities
-        self.added_checklist = self.added_checklist + other.added_checklist
-        self.modified_entities = self.modified_entities + other.modified_entities
-        self.modified_checklist = self.modified_checklist + other.modified_checklist
+        self.added_entities.extend(other.added_entities)
+        self.added_checklist.extend(other.added_checklist)
+        self.modified_entities.extend(other.modified_entities)
+        self.modified_checklist.extend(other.modified_checklist)
 
 
 def merge_entities(left, right):
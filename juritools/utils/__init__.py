@@ -1,8 +1,15 @@
 from .readers import xml_jurinet_reader, html_jurica_reader
-from .instantiate_flashtext import instantiate_flashtext
+from .instantiate_flashtext import NON_WORD_BOUNDARIES, KeywordBackendEnum, KeywordMatcher, instantiate_flashtext
+from .keyword_automaton import KeywordAutomaton
 from .deaccent import deaccent
-from .azertypo import azerty_levenshtein_similarity
+from .azertypo import (
+    azerty_levenshtein_distances,
+    azerty_levenshtein_similar_pairs,
+    azerty_levenshtein_similarity,
+    azerty_levenshtein_similarity_matrix,
+)
 from .is_punctuation import is_punctuation
+from .interval_index import IntervalIndex
 import logging.config
 
 logging.config.dictConfig(
@@ -1,4 +1,9 @@
+import itertools
 from collections import defaultdict
+from typing import Sequence
+
+import numpy as np
+from scipy.sparse import csr_matrix
 from strsimpy.weighted_levenshtein import WeightedLevenshtein
 from scipy.spatial.distance import euclidean
 
@@ -115,3 +120,197 @@ def azerty_levenshtein_similarity(tok1, tok2):
     return 1 - (
         weighted_levenshtein.distance(tok1, tok2) / float(max(len(tok1), len(tok2)))
     )
+
+
+# maximum number of DP cells computed at once by azerty_levenshtein_distances
+_BATCH_CELLS = 1 << 22
+
+
+def _substitution_matrix(alphabet: Sequence[str]) -> np.ndarray:
+    """Substitution costs between every pair of characters of the alphabet"""
+    return np.array(
+        [[0.0 if char_a == char_b else substitution_cost(char_a, char_b) for char_b in alphabet] for char_a in alphabet]
+    )
+
+
+def _encode(texts: Sequence[str], codes: dict[str, int], length: int) -> np.ndarray:
+    """Encodes the texts as rows of character codes, padded with 0"""
+    encoded = np.zeros((len(texts), length), dtype=np.intp)
+    for row, text in enumerate(texts):
+        encoded[row, : len(text)] = [codes[char] for char in text]
+    return encoded
+
+
+def azerty_levenshtein_distances(texts0: Sequence[str], texts1: Sequence[str]) -> np.ndarray:
+    """
+    Inputs:
+    - texts0 (Sequence[str])
+    - texts1 (Sequence[str]), same length as texts0
+    Returns the weighted levenshtein distances adapted to AZERTY keyboard
+    between texts0[k] and texts1[k], equal to weighted_levenshtein.distance
+
+    The dynamic programming runs row by row over all the pairs at once. As the
+    insertion cost is 1, a row is the running minimum of
+    min(deletion, substitution) - j, plus j.
+    """
+    if len(texts0) != len(texts1):
+        raise ValueError("texts0 and texts1 should have the same length")
+    distances = np.zeros(len(texts0))
+    if len(texts0) == 0:
+        return distances
+
+    texts = list(dict.fromkeys(itertools.chain(texts0, texts1)))
+    alphabet = sorted(set("".join(texts)))
+    # code 0 is the padding
+    codes = {char: code for code, char in enumerate(alphabet, 1)}
+    costs = np.ones((len(alphabet) + 1, len(alphabet) + 1))
+    costs[1:, 1:] = _substitution_matrix(alphabet)
+
+    lengths = np.array([len(text) for text in texts])
+    encoded = _encode(texts, codes, max(lengths.max(), 1))
+    indexes = {text: index for index, text in enumerate(texts)}
+    indexes0 = np.array([indexes[text] for text in texts0])
+    indexes1 = np.array([indexes[text] for text in texts1])
+
+    # pairs sorted by length so that each batch is padded to similar lengths
+    max_lengths = np.maximum(lengths[indexes0], lengths[indexes1])
+    order = np.argsort(max_lengths, kind="stable")
+    start = 0
+    while start < len(order):
+        # largest batch starting at start within the cell budget, at least one pair
+        low, high = start + 1, len(order)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if (middle - start) * (max_lengths[order[middle - 1]] + 1) ** 2 <= _BATCH_CELLS:
+                low = middle
+            else:
+                high = middle - 1
+        batch = order[start:low]
+        width = max_lengths[order[low - 1]]
+        distances[batch] = _batch_distances(
+            encoded[indexes0[batch], :width],
+            encoded[indexes1[batch], :width],
+            lengths[indexes0[batch]],
+            lengths[indexes1[batch]],
+            costs,
+        )
+        start = low
+    return distances
+
+
+def _batch_distances(
+    encoded0: np.ndarray,
+    encoded1: np.ndarray,
+    lengths0: np.ndarray,
+    lengths1: np.ndarray,
+    costs: np.ndarray,
+) -> np.ndarray:
+    """Weighted levenshtein distances of a batch of encoded pairs, see azerty_levenshtein_distances"""
+    columns = np.arange(encoded1.shape[1] + 1, dtype=float)
+    pairs = np.arange(len(encoded0))
+
+    # distances between the empty prefix of texts0 and the prefixes of texts1
+    row = np.broadcast_to(columns, (len(encoded0), len(columns))).copy()
+    distances = row[pairs, lengths1]
+    for i in range(encoded0.shape[1]):
+        candidates = np.empty_like(row)
+        candidates[:, 0] = row[:, 0] + 1
+        np.minimum(row[:, 1:] + 1, row[:, :-1] + costs[encoded0[:, i, None], encoded1], out=candidates[:, 1:])
+        row = np.minimum.accumulate(candidates - columns, axis=1) + columns
+        ended = lengths0 == i + 1
+        distances[ended] = row[ended, lengths1[ended]]
+    return distances
+
+
+def azerty_levenshtein_similarity_matrix(texts: Sequence[str]) -> np.ndarray:
+    """
+    Inputs:
+    - texts (Sequence[str])
+    Returns the matrix of the weighted levenshtein similarities adapted to AZERTY
+    keyboard between every pair of texts, equal to azerty_levenshtein_similarity
+    """
+    rows, columns = np.triu_indices(len(texts), k=1)
+    distances = azerty_levenshtein_distances([texts[k] for k in rows], [texts[k] for k in columns])
+    lengths = np.array([len(text) for text in texts], dtype=float)
+    similarities = np.ones((len(texts), len(texts)))
+    similarities[rows, columns] = 1 - distances / np.maximum(lengths[rows], lengths[columns])
+    similarities[columns, rows] = similarities[rows, columns]
+    return similarities
+
+
+def _bigrams(text: str) -> set[str]:
+    return {text[k : k + 2] for k in range(len(text) - 1)}
+
+
+def azerty_levenshtein_similar_pairs(texts: Sequence[str], threshold: float) -> tuple[list[tuple[int, int]], int]:
+    """
+    Inputs:
+    - texts (Sequence[str])
+    - threshold (float)
+    Returns the pairs of indexes (i < j, in the order of itertools.combinations)
+    whose azerty_levenshtein_similarity is above the threshold, and the number
+    of pairs pruned without computing their distance
+
+    A pair is pruned when a lower bound of its distance already keeps its
+    similarity under the threshold:
+    - the length difference, each insertion or deletion costing 1
+    - the distinct bigrams of a text missing from the other, divided by 4: an
+      edition removes at most 2 bigrams and costs at least 0.5
+    The similarity being computed from the bound with the same float operations,
+    the result is exactly the one of the comparison of every pair.
+    """
+    if len(texts) < 2:
+        return [], 0
+    lengths = np.array([len(text) for text in texts])
+
+    # blocking by length: texts sorted by length, each one compared with the next
+    # ones up to the longest length its similarity can reach the threshold with
+    order = np.argsort(lengths, kind="stable")
+    sorted_lengths = lengths[order]
+    distinct_lengths = np.unique(sorted_lengths).tolist()
+    max_lengths = {}
+    for index, length in enumerate(distinct_lengths):
+        max_lengths[length] = length
+        for other_length in distinct_lengths[index + 1 :]:
+            if 1 - (other_length - length) / other_length <= threshold:
+                break
+            max_lengths[length] = other_length
+    stops = np.searchsorted(sorted_lengths, [max_lengths[length] for length in sorted_lengths.tolist()], side="right")
+    counts = np.maximum(stops - np.arange(len(texts)) - 1, 0)
+    rows = np.repeat(np.arange(len(texts)), counts)
+    columns = rows + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    rows, columns = order[rows], order[columns]
+
+    # blocking by bigrams: number of distinct bigrams shared by the candidate pairs
+    bigrams = [_bigrams(text) for text in texts]
+    vocabulary = {bigram: index for index, bigram in enumerate(set().union(*bigrams))}
+    signatures = csr_matrix(
+        (
+            np.ones(sum(len(text_bigrams) for text_bigrams in bigrams), dtype=np.int32),
+            [vocabulary[bigram] for text_bigrams in bigrams for bigram in text_bigrams],
+            np.cumsum([0] + [len(text_bigrams) for text_bigrams in bigrams]),
+        ),
+        shape=(len(texts), max(len(vocabulary), 1)),
+    )
+    shared = np.asarray((signatures @ signatures.T)[rows, columns]).ravel()
+    bigram_counts = np.array([len(text_bigrams) for text_bigrams in bigrams])
+    lower_bounds = np.maximum.reduce(
+        [
+            np.abs(lengths[rows] - lengths[columns]).astype(float),
+            (bigram_counts[rows] - shared) / 4,
+            (bigram_counts[columns] - shared) / 4,
+        ]
+    )
+    max_lengths = np.maximum(lengths[rows], lengths[columns])
+    candidates = 1 - lower_bounds / max_lengths > threshold
+    rows, columns = rows[candidates], columns[candidates]
+
+    # pairs in the order of itertools.combinations
+    rows, columns = np.minimum(rows, columns), np.maximum(rows, columns)
+    sort = np.lexsort((columns, rows))
+    rows, columns = rows[sort], columns[sort]
+    distances = azerty_levenshtein_distances([texts[k] for k in rows], [texts[k] for k in columns])
+    similar = 1 - distances / np.maximum(lengths[rows], lengths[columns]) > threshold
+
+    pruned = len(texts) * (len(texts) - 1) // 2 - len(rows)
+    return list(zip(rows[similar].tolist(), columns[similar].tolist())), pruned
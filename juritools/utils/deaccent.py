@@ -1,4 +1,32 @@
-import re
+_MAPPING = {
+    "A": "ÀÁÂÃÄÅÆ",
+    "C": "Ç",
+    "E": "ÈÉÊË",
+    "I": "ÌÍÎÏ",
+    "N": "Ñ",
+    "O": "ÒÓÔÕÖ",
+    "U": "ÙÚÛÜ",
+    "Y": "Ý",
+    "a": "àáâãäåæ",
+    "c": "ç",
+    "e": "èéêë",
+    "i": "ìíîï",
+    "n": "ñ",
+    "o": "òóôõö",
+    "u": "ùúûüũ",
+    "y": "ýŷÿ",
+}
+# Translation table indexed by code point: each accented letter is replaced by
+# a single letter, so offsets are preserved. Characters after the last accented
+# letter raise IndexError and are left unchanged by str.translate. A string is
+# looked up much faster than a dict by str.translate.
+_ACCENTED_LETTERS = {
+    letter_accent: letter for letter, letters_accent in _MAPPING.items() for letter_accent in letters_accent
+}
+_TRANSLATION_TABLE = "".join(
+    _ACCENTED_LETTERS.get(chr(code_point), chr(code_point))
+    for code_point in range(max(map(ord, _ACCENTED_LETTERS)) + 1)
+)
 
 
 def deaccent(text):
@@ -17,27 +45,7 @@ def deaccent(text):
         >>> deaccent("ÀÁÂÃÄàáâãäÈÉÊËèéêëÍÌÎÏíìîïÒÓÔÕÖòóôõöÙÚÛÜùúûüÑñÇç")
         u'AAAAAaaaaaEEEEeeeeIIIIiiiiOOOOOoooooUUUUuuuuNnCc'
     """
-    mapping = {
-        "A": "ÀÁÂÃÄÅÆ",
-        "C": "Ç",
-        "E": "ÈÉÊË",
-        "I": "ÌÍÎÏ",
-        "N": "Ñ",
-        "O": "ÒÓÔÕÖ",
-        "U": "ÙÚÛÜ",
-        "Y": "Ý",
-        "a": "àáâãäåæ",
-        "c": "ç",
-        "e": "èéêë",
-        "i": "ìíîï",
-        "n": "ñ",
-        "o": "òóôõö",
-        "u": "ùúûüũ",
-        "y": "ýŷÿ",
-    }
     if not isinstance(text, str):
         # assume utf8 for byte strings, use default (strict) error handling
         text = text.decode("utf8")
-    for letter, letter_accent in mapping.items():
-        text = re.sub(rf"[{letter_accent}]", letter, text)
-    return text
+    return text.translate(_TRANSLATION_TABLE)
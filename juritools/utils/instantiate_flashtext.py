@@ -1,30 +1,68 @@
+from enum import Enum
+from typing import Iterable, Union
+
 from flashtext import KeywordProcessor
 
-def instantiate_flashtext(case_sensitive: bool):
-    non_word_boundary_list = [
-        "@",
-        "é",
-        "è",
-        "ê",
-        "ù",
-        "û",
-        "î",
-        "ï",
-        "ö",
-        "ô",
-        "É",
-        "È",
-        "Ê",
-        "Î",
-        "Ï",
-        "Ö",
-        "Ô",
-        "Ú",
-        "Û",
-        "Ù",
-        "Ü",
-    ]
+from .keyword_automaton import KeywordAutomaton
+
+# characters continuing a word, in addition to ascii letters, digits and "_"
+NON_WORD_BOUNDARIES = [
+    "@",
+    "é",
+    "è",
+    "ê",
+    "ù",
+    "û",
+    "î",
+    "ï",
+    "ö",
+    "ô",
+    "É",
+    "È",
+    "Ê",
+    "Î",
+    "Ï",
+    "Ö",
+    "Ô",
+    "Ú",
+    "Û",
+    "Ù",
+    "Ü",
+]
+
+
+class KeywordBackendEnum(Enum):
+    flashtext = "flashtext"
+    automaton = "automaton"
+
+
+# keyword matchers returned by instantiate_flashtext, they share the same API
+KeywordMatcher = Union[KeywordProcessor, KeywordAutomaton]
+
+
+def instantiate_flashtext(
+    case_sensitive: bool,
+    backend: Union[KeywordBackendEnum, str] = KeywordBackendEnum.automaton,
+    non_word_boundaries: Iterable[str] = NON_WORD_BOUNDARIES,
+) -> KeywordMatcher:
+    """Returns an empty keyword matcher
+
+    Both backends find the same keywords at the same positions: the automaton
+    is a faster reimplementation of flashtext, which is kept to compare them.
+
+    Args:
+        case_sensitive (bool): if False, keywords are matched whatever their case
+        backend (Union[KeywordBackendEnum, str], optional): implementation of the matcher.
+            Defaults to KeywordBackendEnum.automaton.
+        non_word_boundaries (Iterable[str], optional): characters continuing a word, in
+            addition to ascii letters, digits and "_". Defaults to NON_WORD_BOUNDARIES.
+
+    Returns:
+        KeywordMatcher: the keyword matcher
+    """
+    if KeywordBackendEnum(backend) is KeywordBackendEnum.automaton:
+        return KeywordAutomaton(case_sensitive, non_word_boundaries)
     keyword_processor = KeywordProcessor(case_sensitive)
-    for non_word in non_word_boundary_list:
+    for non_word in non_word_boundaries:
         keyword_processor.add_non_word_boundary(non_word)
-    return keyword_processor
\ No newline at end of file
+    return keyword_processor
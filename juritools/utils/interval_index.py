@@ -0,0 +1,178 @@
+from collections import Counter
+from typing import Iterable, Iterator
+
+# value of an empty node of the segment tree, interval ends are never negative
+_EMPTY = -1
+
+
+class IntervalIndex:
+    """Index of (start, end) intervals answering overlap queries
+
+    The intervals are stored in a segment tree over their starts, each node
+    holding the largest end of the intervals starting in its range. Whether an
+    interval starts in a range, or one starting before a position ends after it,
+    is then found in O(log n) where n is the largest start, however long the
+    indexed intervals are. Adding or removing an interval also takes O(log n).
+
+    The tree is sparse, only the nodes above an indexed start are stored, and
+    grows by powers of two with the largest start.
+
+    Starts must not be negative, and must not be greater than their end.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[int, int]] = ()):
+        self._intervals: Counter[tuple[int, int]] = Counter()
+        self._ends: Counter[int] = Counter()
+        # ends of the intervals starting at each start
+        self._ends_by_start: dict[int, Counter[int]] = {}
+        # largest end of the intervals starting in the range of each node,
+        # node 1 is the root and the leaves are the nodes _size + start
+        self._tree: dict[int, int] = {}
+        self._size = 1
+        self._length = 0
+        for start, end in intervals:
+            self._check_start(start)
+            self._intervals[(start, end)] += 1
+            self._length += 1
+            self._ends[end] += 1
+            self._ends_by_start.setdefault(start, Counter())[end] += 1
+        self._build(max(self._ends_by_start, default=0) + 1)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return iter(sorted(self._intervals.elements()))
+
+    def add(self, start: int, end: int):
+        """Adds an interval to the index
+
+        Args:
+            start (int): start index of the interval
+            end (int): end index of the interval
+
+        Raises:
+            ValueError: if the start is negative
+        """
+        self._check_start(start)
+        self._intervals[(start, end)] += 1
+        self._length += 1
+        self._ends[end] += 1
+        self._ends_by_start.setdefault(start, Counter())[end] += 1
+        if start >= self._size:
+            self._build(start + 1)
+        else:
+            self._update(start)
+
+    def remove(self, start: int, end: int):
+        """Removes one occurrence of an interval from the index
+
+        Args:
+            start (int): start index of the interval
+            end (int): end index of the interval
+
+        Raises:
+            ValueError: if the interval is not in the index
+        """
+        if (start, end) not in self._intervals:
+            raise ValueError(f"interval ({start}, {end}) is not in the index")
+        self._length -= 1
+        for counter, key in (
+            (self._intervals, (start, end)),
+            (self._ends, end),
+            (self._ends_by_start[start], end),
+        ):
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
+        if not self._ends_by_start[start]:
+            del self._ends_by_start[start]
+        self._update(start)
+
+    def discard(self, start: int, end: int):
+        """Removes one occurrence of an interval from the index if present
+
+        Args:
+            start (int): start index of the interval
+            end (int): end index of the interval
+        """
+        try:
+            self.remove(start, end)
+        except ValueError:
+            pass
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Checks if an interval overlaps or touches an interval of the index
+
+        The interval overlaps if it shares its start or its end with an indexed
+        interval, or if for an indexed interval (s, e):
+        s <= start < e or s < end <= e or start <= s <= end.
+
+        Args:
+            start (int): start index of the interval
+            end (int): end index of the interval
+
+        Returns:
+            bool: True if the interval overlaps an indexed interval
+        """
+        if end in self._ends or start in self._ends_by_start:
+            return True
+        if start <= end:
+            # an indexed interval starting in [start, end], it ends after start,
+            # or starting before start and ending after it
+            return self._max_end(0, end + 1) > start
+        # an indexed interval starting before start and ending after it,
+        # or starting before end and ending after it
+        return self._max_end(0, start) > start or self._max_end(0, end) >= end
+
+    @staticmethod
+    def _check_start(start: int):
+        if start < 0:
+            raise ValueError(f"start must not be negative, got {start}")
+
+    def _build(self, n_starts: int):
+        """Builds the tree for starts lower than n_starts, from the indexed intervals"""
+        while self._size < n_starts:
+            self._size *= 2
+        level = {self._size + start: max(ends) for start, ends in self._ends_by_start.items()}
+        self._tree = dict(level)
+        while level and 1 not in level:
+            parents: dict[int, int] = {}
+            for node, value in level.items():
+                if parents.get(node >> 1, _EMPTY) < value:
+                    parents[node >> 1] = value
+            self._tree.update(parents)
+            level = parents
+
+    def _update(self, start: int):
+        """Updates the nodes above the leaf of a start after an interval was added or removed"""
+        ends = self._ends_by_start.get(start)
+        node = self._size + start
+        value = max(ends) if ends else _EMPTY
+        while node:
+            if self._tree.get(node, _EMPTY) == value:
+                # the nodes above are unchanged
+                return
+            if value == _EMPTY:
+                del self._tree[node]
+            else:
+                self._tree[node] = value
+            sibling = self._tree.get(node ^ 1, _EMPTY)
+            value = max(value, sibling)
+            node >>= 1
+
+    def _max_end(self, low: int, high: int) -> int:
+        """Returns the largest end of the intervals starting in [low, high), or _EMPTY"""
+        low = self._size + max(low, 0)
+        high = self._size + min(high, self._size)
+        result = _EMPTY
+        while low < high:
+            if low & 1:
+                result = max(result, self._tree.get(low, _EMPTY))
+                low += 1
+            if high & 1:
+                high -= 1
+                result = max(result, self._tree.get(high, _EMPTY))
+            low >>= 1
+            high >>= 1
+        return result
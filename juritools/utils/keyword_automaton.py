@@ -0,0 +1,205 @@
+import gc
+import re
+import string
+from itertools import accumulate
+from typing import Any, Iterable, Optional, Union
+
+# key of the keyword ending at a node of the trie, tokens are never empty
+_KEYWORD = ""
+
+
+class KeywordAutomaton:
+    """Multi-keyword matcher with the semantics of flashtext.KeywordProcessor
+
+    Keywords match whole words: a match starts at the beginning of the text or
+    after a word boundary, i.e. a character which is not in `non_word_boundaries`,
+    and must be followed by a word boundary or the end of the text. The longest
+    keyword is kept, and the boundary following a match is consumed, exactly as
+    flashtext does.
+
+    Instead of a trie of characters, the keywords are stored in a trie of tokens:
+    runs of non-boundary characters and single boundary characters. The text is
+    cut into the same tokens by a compiled regex, so that the scan and the build
+    take one dict lookup per token instead of one per character.
+
+    Args:
+        case_sensitive (bool, optional): if False, keywords and texts are lowercased.
+            Defaults to False.
+        non_word_boundaries (Iterable[str], optional): characters continuing a word,
+            in addition to ascii letters, digits and "_". Defaults to ().
+    """
+
+    def __init__(self, case_sensitive: bool = False, non_word_boundaries: Iterable[str] = ()):
+        self.case_sensitive = case_sensitive
+        self.non_word_boundaries = set(string.digits + string.ascii_letters + "_")
+        self.non_word_boundaries.update(non_word_boundaries)
+        # clean name of each keyword, in insertion order
+        self._keywords: dict[str, Any] = {}
+        # built lazily, they depend on the word boundaries
+        self._trie: Optional[dict] = None
+        self._tokenizer: Optional[re.Pattern] = None
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def __contains__(self, keyword: str) -> bool:
+        return self._normalize(keyword) in self._keywords
+
+    def __getitem__(self, keyword: str) -> Any:
+        return self._keywords.get(self._normalize(keyword))
+
+    def add_non_word_boundary(self, character: str):
+        """Adds a character continuing a word"""
+        self.non_word_boundaries.add(character)
+        self._trie = None
+        self._tokenizer = None
+
+    def add_keyword(self, keyword: str, clean_name: Any = None) -> bool:
+        """Adds a keyword, returned as clean_name when found
+
+        Args:
+            keyword (str): keyword to find
+            clean_name (Any, optional): value returned for the keyword.
+                Defaults to the keyword itself.
+
+        Returns:
+            bool: True if the keyword was not known yet
+        """
+        if not clean_name and keyword:
+            clean_name = keyword
+        if not (keyword and clean_name):
+            return False
+        keyword = self._normalize(keyword)
+        is_new = keyword not in self._keywords
+        self._keywords[keyword] = clean_name
+        if self._trie is not None:
+            self._insert(keyword, clean_name)
+        return is_new
+
+    def add_keywords_from_list(self, keyword_list: list[str]):
+        """Adds keywords which are their own clean name"""
+        if not isinstance(keyword_list, list):
+            raise AttributeError("keyword_list should be a list")
+        for keyword in keyword_list:
+            self.add_keyword(keyword)
+
+    def add_keywords_from_dict(self, keyword_dict: dict[Any, Union[list[str], set[str]]]):
+        """Adds the keywords of each clean name, e.g. {"phone": ["tel", "mobile"]}"""
+        for clean_name, keywords in keyword_dict.items():
+            if not isinstance(keywords, (list, set)):
+                raise AttributeError(f"Value of key {clean_name} should be a list")
+            for keyword in keywords:
+                self.add_keyword(keyword, clean_name)
+
+    def get_all_keywords(self) -> dict[str, Any]:
+        """Returns the clean name of each keyword"""
+        return dict(self._keywords)
+
+    def extract_keywords(self, sentence: str, span_info: bool = False) -> list:
+        """Returns the keywords found in the sentence
+
+        Args:
+            sentence (str): text to scan
+            span_info (bool, optional): if True, the start and end indexes of each
+                keyword are returned with its clean name. Defaults to False.
+
+        Returns:
+            list: clean names, or (clean name, start, end) tuples with span_info
+        """
+        if not sentence:
+            return []
+        if not self.case_sensitive:
+            sentence = sentence.lower()
+        matches = self._matches(sentence)
+        if span_info:
+            return [(clean_name, start, end) for clean_name, start, end, _ in matches]
+        return [clean_name for clean_name, _, _, _ in matches]
+
+    def replace_keywords(self, sentence: str) -> str:
+        """Returns the sentence with each keyword found replaced by its clean name
+
+        As with flashtext, the boundary following a keyword is lowercased when
+        the automaton is not case sensitive.
+        """
+        if not sentence:
+            return sentence
+        normalized = sentence if self.case_sensitive else sentence.lower()
+        pieces = []
+        position = 0
+        for clean_name, start, end, boundary in self._matches(normalized):
+            pieces.append(sentence[position:start])
+            pieces.append(clean_name)
+            pieces.append(boundary)
+            position = end + len(boundary)
+        pieces.append(sentence[position:])
+        return "".join(pieces)
+
+    def _normalize(self, keyword: str) -> str:
+        return keyword if self.case_sensitive else keyword.lower()
+
+    def _get_tokenizer(self) -> re.Pattern:
+        if self._tokenizer is None:
+            characters = "".join(re.escape(character) for character in self.non_word_boundaries if len(character) == 1)
+            self._tokenizer = re.compile(f"[{characters}]+|[^{characters}]")
+        return self._tokenizer
+
+    def _get_trie(self) -> dict:
+        if self._trie is None:
+            self._trie = {}
+            # the trie is made of many small dicts: the garbage collector would
+            # otherwise run repeatedly while they are created
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for keyword, clean_name in self._keywords.items():
+                    self._insert(keyword, clean_name)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+        return self._trie
+
+    def _insert(self, keyword: str, clean_name: Any):
+        node = self._trie
+        for token in self._get_tokenizer().findall(keyword):
+            child = node.get(token)
+            if child is None:
+                child = node[token] = {}
+            node = child
+        node[_KEYWORD] = clean_name
+
+    def _matches(self, sentence: str) -> list[tuple[Any, int, int, str]]:
+        """Returns the clean name, start, end and consumed boundary of each match"""
+        trie = self._get_trie()
+        tokens = self._get_tokenizer().findall(sentence)
+        starts = list(accumulate(map(len, tokens), initial=0))
+        non_word_boundaries = self.non_word_boundaries
+        n_tokens = len(tokens)
+        matches = []
+        # first token after the last match, the boundary following a match is consumed
+        index_min = 0
+        # only the tokens starting a keyword are visited
+        for index in [index for index, token in enumerate(tokens) if token in trie]:
+            if index < index_min:
+                continue
+            # a boundary following a word cannot start a keyword
+            if index and tokens[index][0] not in non_word_boundaries and tokens[index - 1][0] in non_word_boundaries:
+                continue
+            # longest keyword starting here and followed by a boundary
+            match = None
+            node = trie[tokens[index]]
+            index_end = index + 1
+            while True:
+                if _KEYWORD in node and (index_end == n_tokens or tokens[index_end][0] not in non_word_boundaries):
+                    match = (node[_KEYWORD], index_end)
+                if index_end == n_tokens:
+                    break
+                node = node.get(tokens[index_end])
+                if node is None:
+                    break
+                index_end += 1
+            if match is not None:
+                clean_name, index_end = match
+                boundary = tokens[index_end] if index_end < n_tokens else ""
+                matches.append((clean_name, starts[index], starts[index_end], boundary))
+                index_min = index_end + 1
+        return matches
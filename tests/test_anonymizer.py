@@ -0,0 +1,164 @@
+import io
+import random
+import re
+import socket
+import string
+import tempfile
+
+from juritools.postprocessing import Anonymizer, OffsetMap, PseudonymAllocator
+from juritools.type import NamedEntity
+
+TEXT = "M. Pierre Dupont, demeurant 12 rue de la Paix à Lyon, contre Marie Curie et pierre dupont."
+
+
+def get_entities() -> list[NamedEntity]:
+    entities = []
+    for text, label in [
+        ("Pierre Dupont", "personnePhysique"),
+        ("12 rue de la Paix", "adresse"),
+        ("Lyon", "localite"),
+        ("Marie Curie", "personnePhysique"),
+        ("pierre dupont", "personnePhysique"),
+    ]:
+        entities.append(NamedEntity(text=text, start=TEXT.index(text), label=label, source="NER model"))
+    # entities are not necessarily ordered
+    return entities[::-1]
+
+
+def test_render():
+    random.seed(0)
+    anonymizer = Anonymizer(TEXT, get_entities())
+    offset_map = OffsetMap()
+    rendered = anonymizer.render(
+        {"personnePhysique": "letters", "adresse": "[...]", "localite": "label"},
+        offset_map,
+    )
+
+    match = re.fullmatch(
+        r"M\. ([A-Z]\.), demeurant \[\.\.\.\] à \[localite\], contre ([A-Z]\.) et ([A-Z]\.)\.",
+        rendered,
+    )
+    assert match
+    # the same letters for the same person
+    assert match.group(1) == match.group(3) != match.group(2)
+    assert offset_map.to_source(0) == 0
+    assert offset_map.to_source(rendered.index("[...]")) == TEXT.index("12 rue")
+    assert offset_map.to_source(rendered.index("[...]") + 2) == TEXT.index("12 rue")
+    assert offset_map.to_source(rendered.index(" à")) == TEXT.index(" à")
+    assert offset_map.to_source(len(rendered)) == len(TEXT)
+
+
+def test_render_overlapping_entities():
+    text = "M. Pierre Dupont est venu."
+    allocator = PseudonymAllocator(seed=0)
+
+    # same start: the longest entity is replaced
+    entities = [
+        NamedEntity(text="Pierre", start=3, label="personnePhysique", source="NER model"),
+        NamedEntity(text="Pierre Dupont", start=3, label="personnePhysique", source="NER model"),
+    ]
+    assert Anonymizer(text, entities, allocator).render({"personnePhysique": "letters"}) == (
+        f"M. {allocator['Pierre Dupont']} est venu."
+    )
+
+    # partial overlap: the whole span is replaced, whatever the policy of the other entity
+    entities = [
+        NamedEntity(text="Pierre Dupont", start=3, label="localite", source="NER model"),
+        NamedEntity(text="Dupont est", start=10, label="personnePhysique", source="NER model"),
+    ]
+    offset_map = OffsetMap()
+    rendered = Anonymizer(text, entities, allocator).render({"personnePhysique": "letters"}, offset_map)
+    assert rendered == f"M. {allocator['Dupont est']} venu."
+    assert offset_map.to_source(rendered.index(" venu")) == text.index(" venu")
+    assert Anonymizer(text, entities).replace_entities_from_indexes(["localite", "personnePhysique"]) == (
+        "M. [localite] venu."
+    )
+
+
+def test_ordered_entities_same_start():
+    # entities sharing a start keep their order, in both directions
+    pierre = NamedEntity(text="Pierre", start=3, label="personnePhysique", source="NER model")
+    pierre_dupont = NamedEntity(text="Pierre Dupont", start=3, label="personnePhysique", source="NER model")
+    venu = NamedEntity(text="venu", start=21, label="localite", source="NER model")
+    anonymizer = Anonymizer("M. Pierre Dupont est venu.", [venu, pierre, pierre_dupont])
+    assert anonymizer._ordered_entities() == [pierre, pierre_dupont, venu]
+    assert anonymizer._ordered_entities(reverse=True) == [venu, pierre, pierre_dupont]
+
+    # the rendered text does not depend on their order
+    for entities in ([pierre, pierre_dupont], [pierre_dupont, pierre]):
+        assert Anonymizer("M. Pierre Dupont est venu.", entities).replace_entities_from_indexes(
+            ["personnePhysique"]
+        ) == "M. [personnePhysique] est venu."
+
+
+def test_replace_entities_from_indexes():
+    anonymizer = Anonymizer(TEXT, get_entities() + [NamedEntity(text="rue", start=31, label="adresse", source="NER model")])
+
+    assert anonymizer.replace_entities_from_indexes(["adresse", "localite"]) == (
+        "M. Pierre Dupont, demeurant [adresse] à [localite], contre Marie Curie et pierre dupont."
+    )
+
+
+def test_pseudonym_allocator():
+    allocator = PseudonymAllocator(seed=42)
+    codes = [allocator[f"name {i}"] for i in range(26 + 26**2 + 10)]
+
+    assert len(set(codes)) == len(codes) == len(allocator)
+    assert sorted(codes[:26]) == [f"{letter}." for letter in string.ascii_uppercase]
+    assert all(len(code) == 3 for code in codes[26 : 26 + 26**2])
+    assert all(len(code) == 4 for code in codes[26 + 26**2 :])
+    assert allocator["NAME 3"] == codes[3]
+    # reproducible with the same seed
+    rerun_allocator = PseudonymAllocator(seed=42)
+    assert [rerun_allocator[f"name {i}"] for i in range(30)] == codes[:30]
+
+    # consistent across the decisions sharing the allocator
+    allocator = PseudonymAllocator(seed=0)
+    renders = [
+        Anonymizer(TEXT, get_entities(), allocator).render({"personnePhysique": "letters"}),
+        Anonymizer(TEXT, get_entities(), allocator).replace_person_entities(["personnePhysique"]),
+    ]
+    assert renders[0] == renders[1]
+    assert renders[0].startswith(f"M. {allocator['Pierre Dupont']}, demeurant")
+
+
+def test_render_to():
+    policies = {"personnePhysique": "letters", "adresse": "[...]", "localite": "label"}
+    anonymizer = Anonymizer(TEXT, get_entities(), PseudonymAllocator(seed=0))
+    rendered = anonymizer.render(policies)
+
+    text_stream = io.StringIO()
+    assert anonymizer.render_to(text_stream, policies, chunk_size=7) == len(rendered)
+    assert text_stream.getvalue() == rendered
+
+    binary_stream = io.BytesIO()
+    anonymizer.render_to(binary_stream, policies, chunk_size=7)
+    assert binary_stream.getvalue().decode("utf-8") == rendered
+
+    # text streams which are not io.TextIOBase
+    with tempfile.SpooledTemporaryFile(mode="w+") as spooled:
+        anonymizer.render_to(spooled, policies, chunk_size=7)
+        spooled.seek(0)
+        assert spooled.read() == rendered
+    with tempfile.SpooledTemporaryFile() as spooled:
+        anonymizer.render_to(spooled, policies, chunk_size=7)
+        spooled.seek(0)
+        assert spooled.read().decode("utf-8") == rendered
+
+    class Writer:
+        def __init__(self):
+            self.chunks = []
+
+        def write(self, chunk: str):
+            self.chunks.append(chunk)
+
+    writer = Writer()
+    anonymizer.render_to(writer, policies, chunk_size=7)
+    assert "".join(writer.chunks) == rendered
+
+    sender, receiver = socket.socketpair()
+    with sender, receiver:
+        anonymizer.render_to(sender, policies)
+        sender.shutdown(socket.SHUT_WR)
+        received = b"".join(iter(lambda: receiver.recv(4096), b""))
+    assert received.decode("utf-8") == rendered
@@ -0,0 +1,114 @@
+import functools
+import os
+import pickle
+import random
+
+import pytest
+
+from juritools.postprocessing import PostProcessFromSents, gazetteers
+from juritools.postprocessing.gazetteers import (
+    ARTIFACT_SOURCES,
+    ARTIFACT_VERSION,
+    _BUILDERS,
+    build_artifact,
+    clear_gazetteers,
+    get_gazetteer,
+    load_artifact,
+    write_artifact,
+    warmup,
+)
+from juritools.utils import KeywordBackendEnum, instantiate_flashtext
+
+
+def test_gazetteers_are_shared():
+    first = PostProcessFromSents(flair_sentences=[], entities=[], checklist=[])
+    second = PostProcessFromSents(flair_sentences=[], entities=[], checklist=[])
+
+    assert first.keyword_cities is second.keyword_cities
+    assert first.keyword_facilities is second.keyword_facilities
+    assert first.keyword_cities is get_gazetteer("cities")
+    assert first.keyword_cities.extract_keywords("Il habite à Paris.") == ["Paris"]
+
+
+def test_warmup():
+    clear_gazetteers()
+    warmup(["voies"])
+    voies = get_gazetteer("voies")
+
+    warmup()
+
+    assert get_gazetteer("voies") is voies
+    assert get_gazetteer("voies").extract_keywords("12 rue de la Paix") == ["Rue"]
+
+
+def test_artifact(tmp_path):
+    path = str(tmp_path / "gazetteers.pkl")
+
+    assert load_artifact(path) is None
+
+    built = build_artifact(path)
+    loaded = load_artifact(path)
+
+    assert set(loaded) == set(ARTIFACT_SOURCES)
+    for name in ARTIFACT_SOURCES:
+        assert loaded[name].get_all_keywords() == built[name].get_all_keywords()
+
+
+def test_stale_artifact(tmp_path):
+    path = str(tmp_path / "gazetteers.pkl")
+    with open(path, "wb") as file:
+        pickle.dump({"version": ARTIFACT_VERSION, "checksum": "stale", "gazetteers": {}}, file)
+
+    assert load_artifact(path) is None
+
+
+def test_artifact_cache(tmp_path, monkeypatch):
+    builds = []
+    for name in ARTIFACT_SOURCES:
+        builder = _BUILDERS[name]
+        monkeypatch.setitem(_BUILDERS, name, lambda builder=builder, name=name: builds.append(name) or builder())
+    monkeypatch.setattr(gazetteers, "ARTIFACT_PATH", str(tmp_path / "package" / "gazetteers.pkl"))
+    monkeypatch.setattr(gazetteers, "CACHE_PATH", str(tmp_path / "cache" / "gazetteers.pkl"))
+
+    # built once and cached outside of the package
+    assert set(gazetteers._load_or_build_artifact()) == set(ARTIFACT_SOURCES)
+    assert os.listdir(tmp_path) == ["cache"]
+    assert set(gazetteers._load_or_build_artifact()) == set(ARTIFACT_SOURCES)
+    assert sorted(builds) == sorted(ARTIFACT_SOURCES)
+
+    # a cache which cannot be written does not build the gazetteers twice
+    builds.clear()
+    (tmp_path / "file").write_text("")
+    monkeypatch.setattr(gazetteers, "CACHE_PATH", str(tmp_path / "file" / "gazetteers.pkl"))
+    assert set(gazetteers._load_or_build_artifact()) == set(ARTIFACT_SOURCES)
+    assert sorted(builds) == sorted(ARTIFACT_SOURCES)
+
+
+def test_write_artifact_failure(tmp_path, monkeypatch):
+    def failing_dump(*args, **kwargs):
+        raise pickle.PicklingError("unpicklable gazetteer")
+
+    monkeypatch.setattr(gazetteers.pickle, "dump", failing_dump)
+    with pytest.raises(pickle.PicklingError):
+        write_artifact({}, str(tmp_path / "gazetteers.pkl"))
+    # no temporary file left behind
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("name", sorted(_BUILDERS))
+def test_gazetteer_backends(monkeypatch, name):
+    automaton = _BUILDERS[name]()
+    monkeypatch.setattr(
+        gazetteers, "instantiate_flashtext", functools.partial(instantiate_flashtext, backend=KeywordBackendEnum.flashtext)
+    )
+    flashtext = _BUILDERS[name]()
+
+    # the keywords of the gazetteer in a text, glued by various separators
+    rng = random.Random(0)
+    keywords = rng.sample(sorted(flashtext.get_all_keywords()), min(2000, len(flashtext)))
+    separators = [" ", ", ", " à ", "-", "'", "é", ". ", "\n", "@"]
+    text = "".join(rng.choice([keyword, keyword.title()]) + rng.choice(separators) for keyword in keywords)
+
+    assert automaton.get_all_keywords() == flashtext.get_all_keywords()
+    assert automaton.extract_keywords(text, span_info=True) == flashtext.extract_keywords(text, span_info=True)
+    assert automaton.replace_keywords(text) == flashtext.replace_keywords(text)
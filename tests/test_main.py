@@ -0,0 +1,150 @@
+import asyncio
+import threading
+
+import pytest
+from flair.data import Sentence
+from jurispacy_tokenizer import JuriSpacyTokenizer
+
+from juritools import main
+from juritools.main import NerBatcher, make_postprocess_executor, ner, ner_async, ner_batch
+from juritools.postprocessing import PostProcessFromSents
+from juritools.postprocessing.token_table import TokenTable
+from juritools.type import Decision
+
+
+def test_ner_async(monkeypatch):
+    batches = []
+
+    def fake_ner_batch(decisions, tokenizer, model, **kwargs):
+        batches.append(list(decisions))
+        if "bad" in decisions:
+            raise ValueError("bad decision")
+        return [
+            {"entities": [decision], "batch_size": kwargs["batch_size"], "executor": kwargs["executor"]}
+            for decision in decisions
+        ]
+
+    monkeypatch.setattr(main, "ner_batch", fake_ner_batch)
+
+    async def run():
+        batcher = NerBatcher(None, None, max_delay=0.01, max_batch_size=4, batch_size=8, executor="postprocess pool")
+        try:
+            responses = await asyncio.gather(*(ner_async(f"decision {i}", batcher) for i in range(6)))
+            faulty = await asyncio.gather(*(ner_async(d, batcher) for d in ["a", "bad"]), return_exceptions=True)
+        finally:
+            batcher.close()
+        return responses, faulty
+
+    responses, faulty = asyncio.run(run())
+
+    assert [response["entities"] for response in responses] == [[f"decision {i}"] for i in range(6)]
+    assert all(response["batch_size"] == 8 for response in responses)
+    # the postprocessing executor is passed through to ner_batch
+    assert all(response["executor"] == "postprocess pool" for response in responses)
+    assert [len(batch) for batch in batches[:2]] == [4, 2]
+    # a faulty decision only fails its own request
+    assert faulty[0]["entities"] == ["a"]
+    assert isinstance(faulty[1], ValueError)
+    assert batches[2:] == [["a", "bad"], ["a"], ["bad"]]
+
+
+def test_ner_batcher_cancelled(monkeypatch):
+    release = threading.Event()
+
+    def fake_ner_batch(decisions, tokenizer, model, **kwargs):
+        if "slow" in decisions:
+            release.wait(5)
+        return [{"entities": [decision]} for decision in decisions]
+
+    monkeypatch.setattr(main, "ner_batch", fake_ner_batch)
+
+    async def run():
+        batcher = NerBatcher(None, None, max_batch_size=1)
+        try:
+            slow = asyncio.ensure_future(ner_async("slow", batcher))
+            while batcher._running is None:
+                await asyncio.sleep(0.001)
+            # waits for the running batch
+            other = asyncio.ensure_future(ner_async("other", batcher))
+            await asyncio.sleep(0.01)
+
+            batcher._running.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(slow, 5)
+            release.set()
+            # the pending decisions still get a batch
+            return await asyncio.wait_for(other, 5)
+        finally:
+            release.set()
+            batcher.close()
+
+    assert asyncio.run(run()) == {"entities": ["other"]}
+
+
+def test_ner_batcher_max_batch_size():
+    with pytest.raises(ValueError):
+        NerBatcher(None, None, max_batch_size=0)
+
+
+class StubModel:
+    """Tags the word following "Monsieur" as a person"""
+
+    def predict(self, sentences, **kwargs):
+        for sentence in sentences:
+            for index in range(1, len(sentence)):
+                if sentence[index - 1].text == "Monsieur":
+                    sentence[index : index + 1].add_label("ner", "personnePhysique", 0.9)
+
+
+def get_decisions() -> list[Decision]:
+    return [
+        Decision(
+            idLabel=str(index),
+            idDecision=str(index),
+            sourceId=index,
+            sourceName="jurinet",
+            text=text,
+            categories=None,
+        )
+        for index, text in enumerate(
+            [
+                "Monsieur Dupont habite à Lyon. Il travaille à l'école Jules Ferry.\nDupont est content.",
+                "Monsieur Martin a un compte bancaire 12345678.\nMonsieur Curie est venu.",
+            ]
+        )
+    ]
+
+
+def test_ner_batch_executor():
+    tokenizer = JuriSpacyTokenizer()
+    decisions = get_decisions()
+    in_process = ner_batch(decisions, tokenizer, StubModel())
+
+    with make_postprocess_executor(tokenizer, 1) as executor:
+        pooled = ner_batch(decisions, tokenizer, StubModel(), executor=executor)
+
+    assert pooled == in_process
+    assert [entity.text for entity in in_process[0]["entities"]][:1] == ["Dupont"]
+
+
+def test_ner_lean(monkeypatch):
+    received = []
+
+    class RecordingPostProcessFromSents(PostProcessFromSents):
+        def __init__(self, flair_sentences, *args, **kwargs):
+            received.append(flair_sentences)
+            super().__init__(flair_sentences, *args, **kwargs)
+
+    monkeypatch.setattr(main, "PostProcessFromSents", RecordingPostProcessFromSents)
+    tokenizer = JuriSpacyTokenizer()
+    decisions = get_decisions()
+    responses = ner_batch(decisions, tokenizer, StubModel())
+    assert len(received) == 2
+    assert all(isinstance(sentences[0], Sentence) for sentences in received)
+
+    # no flair sentence reaches the postprocessing in the lean mode
+    received.clear()
+    assert ner_batch(decisions, tokenizer, StubModel(), lean=True) == responses
+    assert [ner(decision, tokenizer, StubModel(), lean=True) for decision in decisions] == responses
+    assert len(received) == 4
+    assert all(isinstance(sentences, TokenTable) for sentences in received)
@@ -49,3 +49,54 @@ def test_sort_entities():
     assert postpro.end_ents == [5, 105, 205, 305]
     assert postpro.entities_by_category[CategoryEnum.personnePhysique] == [entities[1], entities[0]]
     assert postpro.entities_by_category[CategoryEnum.personneMorale] == [entities[3], entities[2]]
+
+
+def test_delete_entity():
+    entities = [
+        NamedEntity(
+            start=0,
+            label="personnePhysique",
+            text="Jean",
+            source="NER model",
+        ),
+        NamedEntity(
+            start=0,
+            label="personnePhysique",
+            text="Jean Dupont",
+            source="NER model",
+        ),
+        NamedEntity(
+            start=20,
+            label="personnePhysique",
+            text="Dupont",
+            source="NER model",
+        ),
+        NamedEntity(
+            start=40,
+            label="personnePhysique",
+            text="Dupont",
+            source="NER model",
+        ),
+    ]
+
+    postpro = PostProcess(
+        entities=entities,
+        checklist=[],
+        metadata=None,
+    )
+
+    postpro.delete_entity(entities[1])
+
+    assert postpro.entities == [entities[0], entities[2], entities[3]]
+    assert postpro.start_ents == [0, 20, 40]
+    assert postpro.end_ents == [4, 26, 46]
+    assert postpro.check_overlap_entities_from_index(5, 10)
+
+    # the label of the entity has been changed in place
+    entities[3].label = CategoryEnum.personneMorale
+    postpro.delete_entity(entities[3])
+
+    assert postpro.entities == [entities[0], entities[2]]
+    assert postpro.entities_by_category[CategoryEnum.personnePhysique] == [entities[0], entities[2]]
+    assert postpro.start_ents == [0, 20]
+    assert postpro.end_ents == [4, 26]
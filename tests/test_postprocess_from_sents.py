@@ -777,3 +777,43 @@ def test_match_union_delegate():
         expected_entities=expected_entities,
         actual_entities=postpro.entities,
     )
+
+
+def test_apply_methods_document_level():
+    def get_postpro():
+        texts = [
+            "Il habite L'Abergement-Clémenciat et 92400 MARSEILLE à la fois.",
+            "Le tribunal de 92400 Nanterre a rendu son verdict.",
+            "Son compte bancaire numéro 12345678901 est vide.",
+            "Son numéro de tél. est le 0612345678 et son SIREN 732829320.",
+            "Il a été soigné à l'hôpital Sainte Marie de Lyon.",
+        ]
+        input_sentences = []
+        start_position = 0
+        for text in texts:
+            input_sentences.append(Sentence(text, use_tokenizer=tokenizer, start_position=start_position))
+            start_position += len(text) + 1
+        input_entities = [
+            NamedEntity(
+                text="Nanterre",
+                start=80,
+                label="localite",
+                source="NER model",
+            )
+        ]
+        return PostProcessFromSents(input_sentences, input_entities, checklist=[])
+
+    postpro = get_postpro()
+    output = postpro.apply_methods(change_pro_no_context=False)
+    postpro_document = get_postpro()
+    output_document = postpro_document.apply_methods(change_pro_no_context=False, document_level=True)
+
+    assert_equality_between_outputs(
+        actual_output=output_document,
+        expected_output=output,
+    )
+    assert_equality_between_entities(
+        expected_entities=postpro.entities,
+        actual_entities=postpro_document.entities,
+    )
+    assert postpro_document.checklist == postpro.checklist
@@ -1,8 +1,17 @@
 import pytest
-from juritools.predict import JuriTagger, load_ner_model
+from juritools import predict
+from juritools.predict import (
+    JuriTagger,
+    ParallelJuriTagger,
+    PredictionCache,
+    load_ner_model,
+    token_budget_batches,
+)
 from juritools.type import NamedEntity
 from jurispacy_tokenizer import JuriSpacyTokenizer
 import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
 # Windows Fix for PosixPath issue
 if os.name == "nt":
@@ -65,3 +74,155 @@ def test_simple_text_old(juritagger):
             "source": "NER model",
         },
     ]
+
+
+def test_predict_batch():
+    texts = [
+        "Pierre Dupont est ingénieur.\n Il est content.",
+        "Il est content.",
+        "Pierre Dupont est ingénieur.",
+    ]
+    juritaggers = JuriTagger.predict_batch(tokenizer, model, texts, mini_batch_size=2)
+
+    assert [juritag.text for juritag in juritaggers] == texts
+    assert [len(juritag.flair_sentences) for juritag in juritaggers] == [2, 1, 1]
+    for text, juritag in zip(texts, juritaggers):
+        single_juritag = JuriTagger(tokenizer, model)
+        single_juritag.predict(text)
+        expected_entities = single_juritag.get_entity_json_from_flair_sentences()
+        named_entities = juritag.get_entity_json_from_flair_sentences()
+        assert [(e.text, e.start, e.label) for e in named_entities] == [
+            (e.text, e.start, e.label) for e in expected_entities
+        ]
+
+
+def test_parallel_juritagger(juritagger):
+    text = "Pierre Dupont est ingénieur.\n Il est content.\n Marie Curie habite à Lyon."
+    juritagger.predict(text, verbose=False)
+    expected = [(entity.text, entity.start, entity.label) for entity in juritagger.get_entity_json_from_flair_sentences()]
+
+    with ParallelJuriTagger(tokenizer, os.path.join(FIXTURE_DIR, "new_categories_model.pt"), n_workers=2) as parallel:
+        flair_sentences = parallel.predict(text)
+        assert len(flair_sentences) == 3
+        named_entities = parallel.get_entity_json_from_flair_sentences()
+        assert [(entity.text, entity.start, entity.label) for entity in named_entities] == expected
+
+
+class StubModel:
+    """Tags the word following "Monsieur" as a person"""
+
+    def predict(self, sentences, **kwargs):
+        for sentence in sentences:
+            for index in range(1, len(sentence)):
+                if sentence[index - 1].text == "Monsieur":
+                    sentence[index : index + 1].add_label("ner", "personnePhysique", 0.9)
+
+
+@pytest.fixture
+def stub_parallel_juritagger(monkeypatch):
+    """ParallelJuriTagger whose workers are threads sharing a StubModel"""
+    monkeypatch.setattr(predict, "_worker_model", StubModel())
+    parallel = ParallelJuriTagger(tokenizer, "unused/model.pt", n_workers=2)
+    # no worker process is started before the first prediction
+    parallel.executor.shutdown()
+    parallel.executor = ThreadPoolExecutor(max_workers=2)
+    with parallel:
+        yield parallel
+
+
+def test_parallel_juritagger_stream(stub_parallel_juritagger):
+    text = "Monsieur Dupont est ingénieur.\n Il est content.\n Monsieur Martin habite à Lyon.\n Monsieur Curie aussi."
+    stub_juritagger = JuriTagger(tokenizer, StubModel())
+    stub_juritagger.predict(text, verbose=False)
+    named_entities = stub_juritagger.get_entity_json_from_flair_sentences()
+    expected = [(entity.text, entity.start, entity.label) for entity in named_entities]
+    assert [text for text, _, _ in expected] == ["Dupont", "Martin", "Curie"]
+
+    stub_parallel_juritagger.predict(text)
+    named_entities = stub_parallel_juritagger.get_entity_json_from_flair_sentences()
+    assert [(entity.text, entity.start, entity.label) for entity in named_entities] == expected
+    for window_size in [10, 40, 1000]:
+        named_entities = stub_parallel_juritagger.predict_stream(text, window_size=window_size, lean=True)
+        assert [(entity.text, entity.start, entity.label) for entity in named_entities] == expected
+
+
+def test_parallel_juritagger_predict_batch(stub_parallel_juritagger):
+    with pytest.raises(NotImplementedError):
+        ParallelJuriTagger.predict_batch(tokenizer, "unused/model.pt", ["Monsieur Dupont est ingénieur."])
+    with pytest.raises(NotImplementedError):
+        stub_parallel_juritagger.predict_batch(tokenizer, None, ["Monsieur Dupont est ingénieur."])
+
+
+def test_predict_max_tokens_per_batch(juritagger):
+    text = "Pierre Dupont est ingénieur.\n Il est content.\n Marie Curie habite à Lyon depuis le mois de janvier."
+    juritagger.predict(text, verbose=False)
+    expected = [(entity.text, entity.start, entity.label) for entity in juritagger.get_entity_json_from_flair_sentences()]
+
+    batches = token_budget_batches(juritagger.flair_sentences, max_tokens=12)
+    assert sorted(len(sentence) for batch in batches for sentence in batch) == sorted(
+        len(sentence) for sentence in juritagger.flair_sentences
+    )
+    for batch in batches:
+        assert len(batch) == 1 or len(batch) * len(batch[0]) <= 12
+
+    juritagger.predict(text, verbose=False, max_tokens_per_batch=12)
+    named_entities = juritagger.get_entity_json_from_flair_sentences()
+    assert [(entity.text, entity.start, entity.label) for entity in named_entities] == expected
+
+
+def test_prediction_cache():
+    text = "Il est content.\n Pierre Dupont est ingénieur.\n Pierre Dupont est ingénieur.\n"
+    cache = PredictionCache(model)
+    juritagger = JuriTagger(tokenizer, model)
+    juritagger.predict(text, verbose=False)
+    expected = [(entity.text, entity.start, entity.label) for entity in juritagger.get_entity_json_from_flair_sentences()]
+
+    cached_juritagger = JuriTagger(tokenizer, model, cache=cache)
+    cached_juritagger.predict(text, verbose=False)
+    named_entities = cached_juritagger.get_entity_json_from_flair_sentences()
+    assert [(entity.text, entity.start, entity.label) for entity in named_entities] == expected
+    assert (cache.hits, cache.misses) == (0, 3)
+    # the second and the third sentences share the same tokens
+    assert len(cache) == 2
+
+    cached_juritagger.predict(text, verbose=False)
+    named_entities = cached_juritagger.get_entity_json_from_flair_sentences()
+    assert [(entity.text, entity.start, entity.label) for entity in named_entities] == expected
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert cache.hit_rate == 0.5
+
+
+def test_prediction_cache_with_context():
+    context_model = SimpleNamespace(embeddings=SimpleNamespace(embeddings=[SimpleNamespace(context_length=64)]))
+    with pytest.raises(ValueError):
+        PredictionCache(context_model)
+
+
+def test_predict_stream(juritagger):
+    text = "Pierre Dupont est ingénieur.\n Il est content.\n Marie Curie habite à Lyon.\n Pierre Dupont aussi."
+    juritagger.predict(text, verbose=False)
+    expected = [(entity.text, entity.start, entity.label) for entity in juritagger.get_entity_json_from_flair_sentences()]
+
+    for window_size in [10, 40, 1000]:
+        named_entities = juritagger.predict_stream(text, window_size=window_size)
+        assert [(entity.text, entity.start, entity.label) for entity in named_entities] == expected
+    named_entities = juritagger.predict_stream(text, window_size=40, lean=True)
+    assert [(entity.text, entity.start, entity.label) for entity in named_entities] == expected
+
+
+def test_predict_lean(juritagger):
+    text = "Pierre Dupont est ingénieur.\n Il est content.\n Marie Curie habite à Lyon."
+    juritagger.predict(text, verbose=False)
+    expected = [(entity.text, entity.start, entity.label) for entity in juritagger.get_entity_json_from_flair_sentences()]
+
+    juritagger.predict(text, verbose=False, lean=True)
+    assert [
+        (entity.text, entity.start, entity.label) for entity in juritagger.get_entity_json_from_flair_sentences()
+    ] == expected
+    for sentence in juritagger.flair_sentences:
+        for token in sentence:
+            assert token.tags_proba_dist == {}
+            assert token.embedding.numel() == 0
+
+    juritagger.predict(text, verbose=False, all_tags=True, lean=True)
+    assert all(token.tags_proba_dist for sentence in juritagger.flair_sentences for token in sentence)
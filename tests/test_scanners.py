@@ -0,0 +1,38 @@
+import re
+
+import pytest
+
+from juritools.postprocessing.scanners import REGEXES, get_scanner, register_regex, scan
+
+
+def test_scan():
+    text = "Contact : jean.dupont@gmail.com, véhicule AB-123-CD, site https://www.dupont.fr."
+    assert [(name, match.group()) for name, match in scan(text, ["email", "license_plate", "website"])] == [
+        ("email", "jean.dupont@gmail.com"),
+        ("license_plate", "AB-123-CD"),
+        ("website", "https://www.dupont.fr"),
+    ]
+    assert list(scan(text, [])) == []
+
+    # same matches as the alternation of the patterns
+    names = ["email", "numero_identifiant", "license_plate", "iban", "credit_card_number"]
+    text = "1 85 05 78 006 084 36 ou FR76 3000 6000 0112 3456 7890 189 et 4970 1012 3456 7890"
+    assert [match.span() for _, match in scan(text, names)] == [
+        match.span() for match in re.finditer("|".join(REGEXES[name] for name in names), text)
+    ]
+
+
+def test_get_scanner_cache():
+    assert get_scanner(("email", "iban")) is get_scanner(("email", "iban"))
+    assert get_scanner(("email", "iban")) is not get_scanner(("email", "iban"), re.IGNORECASE)
+    assert get_scanner(("website",)).search("WWW.DUPONT.FR")
+
+    with pytest.raises(ValueError):
+        register_regex("not a name", r"\d+")
+
+    register_regex("test_number", r"(\d+)")
+    try:
+        assert [name for name, _ in scan("a 12", ["email", "test_number"])] == ["test_number"]
+    finally:
+        del REGEXES["test_number"]
+        get_scanner.cache_clear()
@@ -0,0 +1,84 @@
+import pickle
+
+import pytest
+from flair.data import Sentence
+from jurispacy_tokenizer import JuriSpacyTokenizer
+
+from juritools.postprocessing import PostProcessFromSents
+from juritools.postprocessing.token_table import IS_ALPHA, IS_CIVILITY, IS_TITLE, IS_UPPER, TokenTable
+from juritools.type import CategoryEnum
+
+tokenizer = JuriSpacyTokenizer()
+
+
+def get_sentences() -> list[Sentence]:
+    first, second = tokenizer.get_tokenized_sentences("Maître Paul DURAND plaide. Il travaille à l'école Jules Ferry.")
+    first[1:3].set_label("ner", "professionnelAvocat")
+    return [first, Sentence(""), second]
+
+
+def test_token_table():
+    sentences = get_sentences()
+    table = TokenTable.from_flair_sentences(sentences)
+
+    assert len(table) == 3
+    assert table.sentence_tokens(0) == (0, len(sentences[0]))
+    assert table.sentence_tokens(1) == (len(sentences[0]), len(sentences[0]))
+    assert table.sentence_strings == [sentence.to_plain_string() for sentence in sentences]
+    assert table.token_starts.tolist() == [token.start_position for sentence in sentences for token in sentence]
+    assert table.sentence_ends[0] == sentences[0].end_position
+    assert table.sentence_ends[2] == sentences[2].end_position
+    assert table.text(1, 3) == "Paul DURAND"
+    assert table.casing[1] == IS_TITLE | IS_ALPHA
+    assert table.casing[2] == IS_UPPER | IS_ALPHA
+    assert table.casing[0] & IS_CIVILITY == 0
+    assert TokenTable.from_flair_sentences([Sentence("Madame Curie")]).casing[0] & IS_CIVILITY
+
+    assert list(table.sentence_spans(0)) == [0]
+    assert list(table.sentence_spans(2)) == []
+    assert table.span_tag(0) == "professionnelAvocat"
+    assert table.tag_mask("professionnel").tolist()[:5] == [False, True, True, False, False]
+
+    table.set_span_tag(0, "personnePhysique")
+    assert table.span_tag(0) == "personnePhysique"
+    assert not table.tag_mask("professionnel").any()
+
+    unpickled = pickle.loads(pickle.dumps(table))
+    assert unpickled.sentence_strings == table.sentence_strings
+    assert unpickled.span_tag(0) == "personnePhysique"
+    assert unpickled.sentence_ends.tolist() == table.sentence_ends.tolist()
+    assert unpickled.casing.tolist() == table.casing.tolist()
+
+
+def test_postprocess_from_token_table():
+    sentences = get_sentences()
+    outputs = []
+    for flair_sentences in [sentences, TokenTable.from_flair_sentences(sentences)]:
+        postpro = PostProcessFromSents(flair_sentences, entities=[], checklist=[])
+        output = postpro.apply_methods(match_against=False, match_cities=False, change_pro_no_context=False)
+        outputs.append([(entity.text, entity.start, entity.label) for entity in output.added_entities])
+
+    assert outputs[0] == outputs[1] == [("Jules Ferry", 50, CategoryEnum.etablissement)]
+
+
+def test_postprocess_from_flair_sentences():
+    sentences = get_sentences()
+    postpro = PostProcessFromSents(sentences, entities=[], checklist=[])
+    sent_string = postpro.table.sentence_strings[2]
+
+    # the methods take either a flair sentence of the decision or its index
+    assert postpro.sentences is sentences
+    by_sentence = postpro.match_facilities(sentences[2], sent_string, 27)
+    assert [entity.text for entity in by_sentence.added_entities] == ["Jules Ferry"]
+    postpro = PostProcessFromSents(sentences, entities=[], checklist=[])
+    by_index = postpro.match_facilities(2, sent_string, 27)
+    assert [entity.text for entity in by_index.added_entities] == ["Jules Ferry"]
+    with pytest.raises(ValueError):
+        postpro.check_compte_bancaire(Sentence("Un compte bancaire"), "Un compte bancaire")
+
+    # the flair sentences are retagged with the table
+    against = [sentences[0], Sentence("c/")]
+    postpro = PostProcessFromSents(against, entities=[], checklist=[])
+    postpro.match_against_case("c/", 1)
+    assert postpro.table.span_tag(0) == "personnePhysique"
+    assert against[0].get_spans("ner")[0].tag == "personnePhysique"
@@ -1,6 +1,15 @@
 import pytest
+from pydantic import BaseModel
 
-from juritools.type import NamedEntity, merge_entities
+from juritools.type import (
+    CategoryEnum,
+    NamedEntity,
+    OutputTrackingEnum,
+    PostProcessOutput,
+    get_output_tracking,
+    merge_entities,
+    output_tracking,
+)
 
 
 def test_named_entity_overlaps():
@@ -57,3 +66,69 @@ def test_merge_entities():
 
     with pytest.raises(ValueError):
         merge_entities(n3, n1)
+
+
+def test_named_entity_assignment():
+    # public assignments behave exactly as with pydantic BaseModel.__setattr__
+    assignments = [
+        ("start", 12),
+        ("start", "not an int"),
+        ("text", ""),
+        ("label", CategoryEnum.localite),
+        ("score", None),
+        ("end", 20),
+        ("entityId", "localite_lyon"),
+        ("unknown_field", 1),
+    ]
+    for name, value in assignments:
+        outcomes = []
+        for setattr_ in (NamedEntity.__setattr__, BaseModel.__setattr__):
+            entity = NamedEntity(text="Dupont", start=4, label="personnePhysique", source="NER model")
+            try:
+                setattr_(entity, name, value)
+            except Exception as exception:
+                outcomes.append((type(exception), str(exception)))
+            else:
+                outcomes.append((entity.__dict__, entity.model_fields_set))
+        assert outcomes[0] == outcomes[1], name
+    assert NamedEntity.model_config.get("validate_assignment") is not True
+
+
+def test_named_entity_fast_construct():
+    entity = NamedEntity.fast_construct(text="Dupont", start=4, label="insee", source="postprocess")
+    expected = NamedEntity(text="Dupont", start=4, label="insee", source="postprocess")
+    assert entity == expected
+    assert hash(entity) == hash(expected)
+    assert entity.model_dump() == expected.model_dump()
+    assert entity.model_dump(exclude_unset=True) == expected.model_dump(exclude_unset=True)
+
+    entity.label = CategoryEnum.personnePhysique
+    assert entity.entityId == "personnePhysique_dupont"
+    assert "label" in entity.model_fields_set
+
+    with pytest.raises(ValueError):
+        NamedEntity.fast_construct(text="", start=4, label="localite", source="postprocess")
+
+
+def test_output_tracking():
+    entity = NamedEntity(text="Dupont", start=0, label="personnePhysique", source="NER model")
+
+    assert get_output_tracking() == OutputTrackingEnum.copy
+    output = PostProcessOutput(added_entities=[entity])
+    assert output.added_entities == [entity]
+    assert output.added_entities[0] is not entity
+
+    with output_tracking("reference"):
+        output = PostProcessOutput(added_entities=[entity])
+        output.add_modified_entity(entity)
+        assert output.added_entities[0] is entity
+        assert output.modified_entities[0] is entity
+
+    with output_tracking(OutputTrackingEnum.disabled):
+        assert get_output_tracking() == OutputTrackingEnum.disabled
+        output = PostProcessOutput(added_entities=[entity])
+        output.add_deleted_entity(entity)
+        assert output == PostProcessOutput()
+        assert output.added_entities == output.deleted_entities == []
+
+    assert get_output_tracking() == OutputTrackingEnum.copy
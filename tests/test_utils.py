@@ -1,4 +1,21 @@
-from juritools.utils import deaccent
+import itertools
+import pickle
+import random
+
+import pytest
+
+from juritools.utils import (
+    NON_WORD_BOUNDARIES,
+    IntervalIndex,
+    KeywordAutomaton,
+    azerty_levenshtein_distances,
+    azerty_levenshtein_similar_pairs,
+    azerty_levenshtein_similarity,
+    azerty_levenshtein_similarity_matrix,
+    deaccent,
+    instantiate_flashtext,
+)
+from juritools.utils.azertypo import weighted_levenshtein
 
 
 def test_deacccent():
@@ -7,3 +24,128 @@ def test_deacccent():
 
     assert deaccent_text == "½ u œ 1 སྒྱ AAAAAaaaaaEEEEeeeeIIIIiiiiOOOOOoooooUUUUuuuuNnCc§³²¹…"
     assert len(text) == len(deaccent_text)
+
+
+def test_interval_index():
+    index = IntervalIndex([(10, 15), (20, 30)])
+    index.add(40, 45)
+
+    assert len(index) == 3
+    # same start or same end
+    assert index.overlaps(10, 12)
+    assert index.overlaps(8, 15)
+    # start or end inside an interval
+    assert index.overlaps(12, 18)
+    assert index.overlaps(16, 25)
+    # an interval inside the new one, or starting at its end
+    assert index.overlaps(35, 50)
+    assert index.overlaps(0, 10)
+    assert not index.overlaps(0, 9)
+    assert not index.overlaps(30, 35)
+    assert not index.overlaps(15, 19)
+    assert not index.overlaps(31, 39)
+
+    index.remove(40, 45)
+
+    assert not index.overlaps(35, 50)
+    with pytest.raises(ValueError):
+        index.remove(40, 45)
+    with pytest.raises(ValueError):
+        index.add(-1, 5)
+
+
+def test_interval_index_long_interval():
+    def overlaps(intervals, start, end):
+        return any(
+            start == s or end == e or s <= start < e or s < end <= e or start <= s <= end for s, e in intervals
+        )
+
+    rng = random.Random(0)
+    # a paragraph long address followed by short entities
+    intervals = [(0, 5000)] + [(5010 + 20 * i, 5020 + 20 * i) for i in range(500)]
+    index = IntervalIndex(intervals)
+    assert list(index) == intervals
+    assert not index.overlaps(5021, 5024)
+    assert index.overlaps(4990, 5003)
+
+    for _ in range(2000):
+        if rng.random() < 0.2:
+            start = rng.randrange(16000)
+            interval = (start, start + rng.randrange(1, 50))
+            index.add(*interval)
+            intervals.append(interval)
+        elif rng.random() < 0.2:
+            interval = intervals.pop(rng.randrange(len(intervals)))
+            index.remove(*interval)
+        start = rng.randrange(16000)
+        end = start + rng.randrange(50) if rng.random() < 0.9 else rng.randrange(16000)
+        assert index.overlaps(start, end) == overlaps(intervals, start, end)
+    assert list(index) == sorted(intervals)
+
+
+def test_azerty_levenshtein_vectorized():
+    texts = ["Dupont", "Dupomt", "Dupond", "DUPONT", "Durand", "Duran", "Éric", "eric", "D", ""]
+    pairs = [(text0, text1) for text0 in texts for text1 in texts]
+    distances = azerty_levenshtein_distances([text0 for text0, _ in pairs], [text1 for _, text1 in pairs])
+    assert list(distances) == [weighted_levenshtein.distance(text0, text1) for text0, text1 in pairs]
+    assert azerty_levenshtein_distances([], []).shape == (0,)
+    with pytest.raises(ValueError):
+        azerty_levenshtein_distances(["a"], [])
+
+    names = texts[:-1]
+    similarities = azerty_levenshtein_similarity_matrix(names)
+    for i, name1 in enumerate(names):
+        assert similarities[i, i] == 1.0
+        for j, name2 in enumerate(names[i + 1 :], i + 1):
+            assert similarities[i, j] == similarities[j, i] == azerty_levenshtein_similarity(name1, name2)
+
+
+def test_azerty_levenshtein_similar_pairs():
+    names = ["Dupont", "Dupomt", "Dupond", "DUPONT", "Durand", "Duran", "Éric", "Eric", "Jean-Pierre Martin", "Li", "Lu"]
+    for threshold in [0.0, 0.5, 0.8, 0.9]:
+        pairs, pruned = azerty_levenshtein_similar_pairs(names, threshold)
+        assert pairs == [
+            (i, j)
+            for i, j in itertools.combinations(range(len(names)), 2)
+            if azerty_levenshtein_similarity(names[i], names[j]) > threshold
+        ]
+        assert 0 <= pruned <= len(names) * (len(names) - 1) // 2 - len(pairs)
+
+    pairs, pruned = azerty_levenshtein_similar_pairs(names, 0.8)
+    assert pairs == [(0, 1), (0, 2), (4, 5)]
+    assert pruned > 0
+    assert azerty_levenshtein_similar_pairs(["Dupont"], 0.8) == ([], 0)
+
+
+def test_keyword_automaton():
+    keywords = KeywordAutomaton(True, NON_WORD_BOUNDARIES)
+    keywords.add_keywords_from_dict({"personnePhysique": ["Paul", "Paul Durand"], "localite": ["Lyon"]})
+    text = "Paul Durand, né à Lyon, Pauline et Paul@Lyon."
+
+    assert keywords.extract_keywords(text, span_info=True) == [("personnePhysique", 0, 11), ("localite", 18, 22)]
+    assert keywords.replace_keywords(text) == "personnePhysique, né à localite, Pauline et Paul@Lyon."
+    # keywords can be added after a scan
+    keywords.add_keyword("Pauline", "personnePhysique")
+    assert keywords.extract_keywords(text) == ["personnePhysique", "localite", "personnePhysique"]
+    assert pickle.loads(pickle.dumps(keywords)).extract_keywords(text) == keywords.extract_keywords(text)
+    with pytest.raises(AttributeError):
+        keywords.add_keywords_from_dict({"localite": "Lyon"})
+
+
+@pytest.mark.parametrize("case_sensitive", [True, False])
+def test_keyword_automaton_as_flashtext(case_sensitive):
+    rng = random.Random(0)
+    alphabet = "abAB éÉ@.-,'1_"
+    for _ in range(2000):
+        keyword_dict = {
+            label: ["".join(rng.choices(alphabet, k=rng.randint(1, 5))) for _ in range(rng.randint(1, 3))]
+            for label in rng.sample(["x", "y", "z"], 2)
+        }
+        text = "".join(rng.choices(alphabet, k=rng.randint(0, 40)))
+        flashtext = instantiate_flashtext(case_sensitive)
+        flashtext.add_keywords_from_dict(keyword_dict)
+        automaton = KeywordAutomaton(case_sensitive, NON_WORD_BOUNDARIES)
+        automaton.add_keywords_from_dict(keyword_dict)
+
+        assert automaton.extract_keywords(text, span_info=True) == flashtext.extract_keywords(text, span_info=True)
+        assert automaton.replace_keywords(text) == flashtext.replace_keywords(text)